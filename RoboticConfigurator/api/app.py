@@ -1,46 +1,433 @@
-from flask import Flask, request
+import time
+
+# measured before the heavy imports below
+startup_began = time.perf_counter()
+
+import hashlib
+import json as jsonlib
+import os
+from flask import Flask, Response, g, request, stream_with_context
 import numpy as np
-from rolly.search import search
+from rolly.cache import SearchCache, problem_key
+from rolly.search import search, search_batch, verify_search_input
+from rolly.search import warmup as warmup_search
 from flask_cors import CORS, cross_origin
+from dummy.core import forward_kinematics_batch, inverse_kinematics_batch
+from dummy.Robot import Robot
+from dummy import metrics, so3
+
+from encoding import array_response, wants_binary
+from flight import SingleFlight
+from jobs import JobManager, QueueFull
 
 app = Flask(__name__)
-cors = CORS(app)
+# binary kinematics responses describe their array in these headers
+cors = CORS(app, expose_headers=["X-Array", "X-Shape", "X-Failed"])
 app.config['CORS_HEADERS'] = 'Content-Type'
 
-@app.post("/api/robots/create")
+# shared by every worker on this machine, repeat problems skip the search
+search_cache = SearchCache(os.environ.get("ROLLY_CACHE_PATH", "rolly_cache.sqlite3"))
+
+def run_search(progress, points, orientations, euler_seq):
+    robot_node = search(points_only=points, orientations_only=orientations, euler_seq=euler_seq, cache=search_cache, progress=progress)
+
+    return robot_result(robot_node)
+
+def run_search_batch(progress, problems):
+    robot_nodes = search_batch(problems, cache=search_cache, progress=progress)
+
+    results = []
+    for robot_node in robot_nodes:
+        if robot_node is None:
+            results.append({"error": True, "message": "Could not find robot"})
+        else:
+            results.append({"error": False, **robot_result(robot_node)})
+
+    return {"results": results}
+
+# identical problems submitted at the same time share one search
+search_flight = SingleFlight()
+
+search_jobs = JobManager(
+    run_search,
+    max_workers=int(os.environ.get("ROLLY_SEARCH_WORKERS", 2)),
+    max_queued=int(os.environ.get("ROLLY_SEARCH_QUEUE", 16)))
+
+# synchronous kinematics requests are answered inline, keep each one short
+max_ik_targets = int(os.environ.get("ROLLY_MAX_IK_TARGETS", 256))
+max_ik_iterations = int(os.environ.get("ROLLY_MAX_IK_ITERATIONS", 10000))
+max_fk_configurations = int(os.environ.get("ROLLY_MAX_FK_CONFIGURATIONS", 4096))
+
+max_batch_problems = int(os.environ.get("ROLLY_MAX_BATCH_PROBLEMS", 8))
+
+def warmup() -> float:
+    """
+    Build every lazily loaded table and import up front. Returns the seconds it took.
+    """
+    began = time.perf_counter()
+    warmup_search()
+    return time.perf_counter() - began
+
+# a preloading server (gunicorn --preload) runs this once before forking,
+# gunicorn.conf.py freezes the result so workers keep sharing it
+warmup_seconds = warmup() if os.environ.get("ROLLY_WARMUP", "1") != "0" else 0
+
+startup_seconds = time.perf_counter() - startup_began
+print("API ready in", round(startup_seconds, 3), "seconds (warmup", round(warmup_seconds, 3), "seconds)")
+
+def max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return None
+
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+@app.before_request
+def start_request_timer():
+    g.request_began = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # streaming responses are timed until their headers are sent
+    if "request_began" in g:
+        metrics.registry.observe("request_" + str(request.endpoint), time.perf_counter() - g.request_began)
+    metrics.inc("responses_" + str(response.status_code))
+    return response
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    Counters and per-stage latency histograms of this worker, in the Prometheus text format.
+    """
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+@app.get("/api/health")
 @cross_origin()
-def robot_create():
+def health():
+    return {
+        "error": False,
+        "pid": os.getpid(),
+        "startup_seconds": startup_seconds,
+        "warmup_seconds": warmup_seconds,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+def parse_search_request():
+    """
+    Read the search problem from the request body.
+    Returns (problem, None) or (None, error response).
+    """
     content_type = request.headers.get('Content-Type')
     if (content_type == 'application/json'):
         json = request.json
     else:
-        return {
+        return (None, {
             "error": True,
             "message": "Content is not supported."
-        }
+        })
 
+    return parse_problem(json)
+
+@metrics.timed("validation")
+def parse_problem(json):
     try:
         points = np.array(json['points'])
         orientations = np.array(json['orientations'])
         euler_seq = json['orientationSequence']
+    except (KeyError, TypeError):
+        return (None, {
+            "error": True,
+            "message": "Please specify points, orientations, and orientationSequence"
+        })
+
+    return ({"points": points, "orientations": orientations, "euler_seq": euler_seq}, None)
+
+def search_key(problem: dict) -> str:
+    """
+    problem_key of a parsed problem. Raises on malformed input, like search does.
+    """
+    verify_search_input(problem["points"], problem["orientations"], dict())
+    return problem_key(problem["points"], problem["orientations"], euler_seq=problem["euler_seq"])
+
+@metrics.timed("serialization")
+def robot_result(robot_node):
+    return {
+        "robot_dh": robot_node.dh_parameters.tolist(),
+        "num_joints": robot_node.num_joints,
+    }
+
+@app.post("/api/robots/create")
+@cross_origin()
+def robot_create():
+    (problem, error) = parse_search_request()
+    if error is not None:
+        return error
+
+    print(problem["points"], problem["orientations"])
+
+    try:
+        key = search_key(problem)
+        result = search_flight.do(key, lambda: run_search(None, **problem))
+    except Exception as inst:
+        return {
+            "error": True,
+            "message": inst.args[0]
+        }
+
+    return {
+        "error": False,
+        **result,
+    }
+
+@app.post("/api/robots/create/batch")
+@cross_origin()
+def robot_create_batch():
+    """
+    Solve several problems in one shared search, as a background job like /api/jobs.
+    Takes {"problems": [...]} where every problem has the /api/robots/create body,
+    at most max_batch_problems of them. The finished job's result holds "results",
+    one per problem in the same order.
+    """
+    content_type = request.headers.get('Content-Type')
+    json = request.json if content_type == 'application/json' else None
+    if (not isinstance(json, dict) or not isinstance(json.get('problems'), list)):
+        return {
+            "error": True,
+            "message": "Please specify a list of problems."
+        }
+
+    if len(json['problems']) > max_batch_problems:
+        return {
+            "error": True,
+            "message": "Please send at most " + str(max_batch_problems) + " problems per batch."
+        }
+
+    problems = []
+    keys = []
+    for problem_json in json['problems']:
+        (problem, error) = parse_problem(problem_json)
+        if error is not None:
+            return error
+
+        try:
+            keys.append(search_key(problem))
+        except Exception as inst:
+            return {
+                "error": True,
+                "message": inst.args[0]
+            }
+
+        problems.append({
+            "points_only": problem["points"],
+            "orientations_only": problem["orientations"],
+            "euler_seq": problem["euler_seq"],
+        })
+
+    # the same batch (in any order) shares one job
+    key = "batch:" + hashlib.sha256(",".join(sorted(keys)).encode("utf-8")).hexdigest()
+
+    return submit_job(key, run=run_search_batch, problems=problems)
+
+@app.post("/api/robots/fk")
+@cross_origin()
+def robot_fk():
+    """
+    Every link frame for many joint configurations.
+    Takes {"robot_dh": [...], "thetas": [[...], ...]} and returns frames, shaped
+    (configurations, joints, 4, 4). See encoding.array_response for binary responses.
+    At most max_fk_configurations configurations per request.
+    """
+    content_type = request.headers.get('Content-Type')
+    if (content_type != 'application/json'):
+        return {
+            "error": True,
+            "message": "Content is not supported."
+        }
+
+    try:
+        robot = Robot(np.array(request.json['robot_dh']))
+        thetas = np.array(request.json['thetas'])
+
+        if len(thetas) > max_fk_configurations:
+            raise Exception("Please send at most " + str(max_fk_configurations) + " configurations per request")
+
+        frames = forward_kinematics_batch(robot, thetas)
     except KeyError:
         return {
             "error": True,
-            "message": "Please specify points, orientations, and orientationSequence"
+            "message": "Please specify robot_dh and thetas"
+        }
+    except Exception as inst:
+        return {
+            "error": True,
+            "message": inst.args[0]
         }
 
-    print(points, orientations)
+    return array_response(request, {"frames": frames})
+
+@app.post("/api/robots/ik")
+@cross_origin()
+def robot_ik():
+    """
+    Joint angles for many targets, each solve is warm started from the previous one.
+    Takes {"robot_dh": [...], "positions": [...]} with optional "orientations" and
+    "orientationSequence" and returns thetas, shaped (targets, joints), and the
+    indexes of the targets that failed (their thetas are NaN, null in JSON).
+    At most max_ik_targets targets per request, and targets left once max_ik_iterations
+    solver steps are used up fail.
+    """
+    content_type = request.headers.get('Content-Type')
+    if (content_type != 'application/json'):
+        return {
+            "error": True,
+            "message": "Content is not supported."
+        }
+
+    json = request.json
 
     try:
-        robot_node = search(points_only=points, orientations_only=orientations, euler_seq=euler_seq)
+        robot = Robot(np.array(json['robot_dh']))
+        positions = np.array(json['positions'], dtype=float).reshape((-1, 3))
+
+        orientations = None
+        if len(json.get('orientations', [])) > 0:
+            orientations = so3.euler_to_matrix(json.get('orientationSequence', "xyz"), np.array(json['orientations'], dtype=float).reshape((-1, 3)))
+
+        if len(positions) > max_ik_targets:
+            raise Exception("Please send at most " + str(max_ik_targets) + " positions per request")
+
+        (thetas, failed) = inverse_kinematics_batch(
+            robot,
+            target_positions=positions,
+            target_orientations=orientations,
+            allowed_pos_error=10,
+            allowed_ori_error=0.1,
+            max_total_iterations=max_ik_iterations)
+    except KeyError:
+        return {
+            "error": True,
+            "message": "Please specify robot_dh and positions"
+        }
     except Exception as inst:
         return {
             "error": True,
             "message": inst.args[0]
         }
 
+    # JSON has no NaN
+    if wants_binary(request):
+        return array_response(request, {"thetas": thetas}, {"failed": failed})
+
     return {
         "error": False,
-        "robot_dh": robot_node.robot.dh_parameters.tolist(),
-        "num_joints": robot_node.robot.num_joints,
-    }
\ No newline at end of file
+        "failed": failed,
+        "thetas": [None if i in failed else row.tolist() for (i, row) in enumerate(thetas)],
+    }
+
+@app.post("/api/jobs")
+@cross_origin()
+def job_create():
+    (problem, error) = parse_search_request()
+    if error is not None:
+        return error
+
+    try:
+        key = search_key(problem)
+    except Exception as inst:
+        return {
+            "error": True,
+            "message": inst.args[0]
+        }
+
+    return submit_job(key, **problem)
+
+def submit_job(key: str, **params):
+    try:
+        (job, cancel_token) = search_jobs.submit(key=key, **params)
+    except QueueFull as inst:
+        return ({
+            "error": True,
+            "message": inst.args[0]
+        }, 503, {"Retry-After": "5"})
+
+    return ({
+        "error": False,
+        **job.to_dict(),
+        "cancel_token": cancel_token,
+    }, 202)
+
+@app.get("/api/jobs/<job_id>")
+@cross_origin()
+def job_status(job_id):
+    job = search_jobs.get(job_id)
+    if job is None:
+        return ({
+            "error": True,
+            "message": "Job not found."
+        }, 404)
+
+    return {
+        "error": job.status == "failed",
+        **job.to_dict(),
+    }
+
+@app.delete("/api/jobs/<job_id>")
+@cross_origin()
+def job_cancel(job_id):
+    """
+    Withdraw one submission, takes the cancel_token the submission got as ?cancel_token=.
+    Jobs shared by identical submissions keep running until every submitter has cancelled.
+    """
+    try:
+        job = search_jobs.cancel(job_id, request.args.get("cancel_token"))
+    except Exception as inst:
+        return ({
+            "error": True,
+            "message": inst.args[0]
+        }, 403)
+
+    if job is None:
+        return ({
+            "error": True,
+            "message": "Job not found."
+        }, 404)
+
+    return {
+        "error": False,
+        **job.to_dict(),
+    }
+
+@app.get("/api/jobs/<job_id>/events")
+@cross_origin()
+def job_events(job_id):
+    """
+    Server-sent events, one per progress event. The stream ends when the job finishes.
+    """
+    job = search_jobs.get(job_id)
+    if job is None:
+        return ({
+            "error": True,
+            "message": "Job not found."
+        }, 404)
+
+    def stream():
+        sent = 0
+        while True:
+            events = job.wait_for_events(sent, timeout=15)
+
+            # comment line keeps proxies from closing an idle stream
+            if len(events) == 0:
+                yield ": keep-alive\n\n"
+
+            for event in events:
+                yield "data: " + jsonlib.dumps(event) + "\n\n"
+            sent += len(events)
+
+            if job.finished and sent >= len(job.events):
+                yield "event: end\ndata: " + jsonlib.dumps(job.to_dict()) + "\n\n"
+                return
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
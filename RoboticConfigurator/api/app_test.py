@@ -0,0 +1,122 @@
+import io
+import os
+import tempfile
+import numpy as np
+import pytest
+
+# set before app is imported, it reads them at import time
+os.environ["ROLLY_WARMUP"] = "0"
+os.environ["ROLLY_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "rolly_cache.sqlite3")
+
+import app as api
+from jobs import JobManager
+from jobs_test import wait_finished
+
+dh = [[0, 0, 0], [-1 * np.pi / 2, 100, 200], [np.pi / 2, 300, 0]]
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
+
+def fk(client, thetas, accept: str = "application/json"):
+    return client.post("/api/robots/fk", json={"robot_dh": dh, "thetas": thetas}, headers={"Accept": accept})
+
+def test_fk_json(client):
+    body = fk(client, [[0, 0, 0], [0.1, 0.2, 0.3]]).json
+    assert body["error"] is False
+    assert np.array(body["frames"]).shape == (2, 3, 4, 4)
+
+def test_fk_octet_stream(client):
+    response = fk(client, [[0, 0, 0], [0.1, 0.2, 0.3]], "application/octet-stream")
+    assert response.headers["X-Array"] == "frames"
+    assert response.headers["X-Shape"] == "2,3,4,4"
+
+    frames = np.frombuffer(response.get_data(), dtype="<f4").reshape((2, 3, 4, 4))
+    assert np.allclose(frames, fk(client, [[0, 0, 0], [0.1, 0.2, 0.3]]).json["frames"], atol=1e-3)
+
+def test_fk_npy(client):
+    response = fk(client, [[0, 0, 0]], "application/x-npy")
+    assert np.load(io.BytesIO(response.get_data())).shape == (1, 3, 4, 4)
+
+def test_fk_errors(client, monkeypatch):
+    assert client.post("/api/robots/fk", json={"robot_dh": dh}).json["message"] == "Please specify robot_dh and thetas"
+
+    monkeypatch.setattr(api, "max_fk_configurations", 2)
+    body = fk(client, [[0, 0, 0]] * 3).json
+    assert body["error"] is True
+    assert body["message"] == "Please send at most 2 configurations per request"
+
+def ik_targets(client):
+    # the end of the arm for known joint angles, plus one far out of reach
+    frames = np.array(fk(client, [[0, 0, 0], [0.2, 0.1, 0]]).json["frames"])
+    return frames[:, -1, :3, 3].tolist() + [[10000, 0, 0]]
+
+def test_ik_json(client):
+    body = client.post("/api/robots/ik", json={"robot_dh": dh, "positions": ik_targets(client)}).json
+    assert body["error"] is False
+    assert body["failed"] == [2]
+    assert len(body["thetas"]) == 3
+    assert body["thetas"][2] is None
+    assert len(body["thetas"][0]) == 3
+
+def test_ik_octet_stream(client):
+    response = client.post(
+        "/api/robots/ik",
+        json={"robot_dh": dh, "positions": ik_targets(client)},
+        headers={"Accept": "application/octet-stream"})
+    assert response.headers["X-Array"] == "thetas"
+    assert response.headers["X-Shape"] == "3,3"
+    assert response.headers["X-Failed"] == "2"
+
+    thetas = np.frombuffer(response.get_data(), dtype="<f4").reshape((3, 3))
+    assert np.all(np.isnan(thetas[2]))
+    assert not np.any(np.isnan(thetas[:2]))
+
+def test_ik_errors(client, monkeypatch):
+    assert client.post("/api/robots/ik", json={"robot_dh": dh}).json["message"] == "Please specify robot_dh and positions"
+
+    monkeypatch.setattr(api, "max_ik_targets", 2)
+    body = client.post("/api/robots/ik", json={"robot_dh": dh, "positions": [[0, 0, 0]] * 3}).json
+    assert body["error"] is True
+    assert body["message"] == "Please send at most 2 positions per request"
+
+def test_ik_iteration_budget(client, monkeypatch):
+    monkeypatch.setattr(api, "max_ik_iterations", 0)
+    body = client.post("/api/robots/ik", json={"robot_dh": dh, "positions": ik_targets(client)}).json
+    assert body["failed"] == [0, 1, 2]
+
+def test_batch_errors(client, monkeypatch):
+    assert client.post("/api/robots/create/batch", json={}).json["message"] == "Please specify a list of problems."
+
+    monkeypatch.setattr(api, "max_batch_problems", 1)
+    problem = {"points": [[100, 0, 0]]}
+    body = client.post("/api/robots/create/batch", json={"problems": [problem, problem]}).json
+    assert body["error"] is True
+    assert body["message"] == "Please send at most 1 problems per batch."
+
+def test_batch_rejects_invalid_problems(client):
+    body = client.post("/api/robots/create/batch", json={"problems": [{"points": []}]}).json
+    assert body["message"] == "Please specify points, orientations, and orientationSequence"
+
+    problem = {"points": [[1, 2]], "orientations": [[0, 0, 0]], "orientationSequence": "xyz"}
+    body = client.post("/api/robots/create/batch", json={"problems": [problem]}).json
+    assert body["error"] is True
+    assert body["message"] == "Points must be (x,y,z) vectors"
+
+def test_cancel_needs_the_submission_token(client, monkeypatch):
+    def run(progress, **params):
+        while True:
+            progress({"stage": "candidate"})
+
+    monkeypatch.setattr(api, "search_jobs", JobManager(run))
+
+    body = client.post("/api/jobs", json={"points": [[100, 0, 0]], "orientations": [], "orientationSequence": "xyz"}).json
+    assert client.delete("/api/jobs/" + body["job_id"]).status_code == 403
+
+    response = client.delete("/api/jobs/" + body["job_id"] + "?cancel_token=" + body["cancel_token"])
+    assert response.status_code == 200
+    wait_finished(api.search_jobs.get(body["job_id"]))
+    assert api.search_jobs.get(body["job_id"]).status == "cancelled"
+
+    # a finished job ignores further cancels
+    assert client.delete("/api/jobs/" + body["job_id"] + "?cancel_token=" + body["cancel_token"]).json["status"] == "cancelled"
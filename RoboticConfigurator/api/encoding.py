@@ -0,0 +1,50 @@
+import io
+import numpy as np
+from flask import Response
+from dummy import metrics
+
+binary_mimetypes = ["application/octet-stream", "application/x-npy"]
+
+def response_mimetype(request) -> str:
+    return request.accept_mimetypes.best_match(["application/json"] + binary_mimetypes, default="application/json")
+
+def wants_binary(request) -> bool:
+    return response_mimetype(request) in binary_mimetypes
+
+@metrics.timed("serialization")
+def array_response(request, arrays: dict, extra: dict = dict()):
+    """
+    Respond with numeric arrays in the encoding the client asked for in its Accept header.
+
+    application/json (default): Arrays as nested lists, next to the extra fields.
+    application/octet-stream: The first array as raw little-endian float32, its shape
+        in the X-Shape header (comma separated) and extra fields as X- headers.
+    application/x-npy: The first array as a float32 .npy file.
+    """
+    mimetype = response_mimetype(request)
+
+    if mimetype not in binary_mimetypes:
+        return {
+            "error": False,
+            **extra,
+            **{name: np.asarray(array).tolist() for (name, array) in arrays.items()},
+        }
+
+    (name, array) = next(iter(arrays.items()))
+    array = np.ascontiguousarray(array, dtype="<f4")
+
+    headers = {
+        "X-Array": name,
+        "X-Shape": ",".join([str(n) for n in array.shape]),
+    }
+    for (key, value) in extra.items():
+        headers["X-" + key.replace("_", "-").title()] = ",".join([str(v) for v in np.ravel(value)])
+
+    if mimetype == "application/x-npy":
+        buffer = io.BytesIO()
+        np.save(buffer, array)
+        body = buffer.getvalue()
+    else:
+        body = array.tobytes()
+
+    return Response(body, mimetype=mimetype, headers=headers)
@@ -0,0 +1,42 @@
+import io
+import numpy as np
+from flask import Flask, request
+from encoding import array_response
+
+app = Flask(__name__)
+frames = np.arange(24, dtype=float).reshape((2, 3, 4))
+
+def respond(accept: str = None):
+    headers = {} if accept is None else {"Accept": accept}
+    with app.test_request_context(headers=headers):
+        return array_response(request, {"frames": frames}, {"failed": [1, 4]})
+
+def test_json_by_default():
+    body = respond()
+    assert body["error"] is False
+    assert body["failed"] == [1, 4]
+    assert body["frames"] == frames.tolist()
+    assert respond("application/json") == body
+
+def test_octet_stream():
+    response = respond("application/octet-stream")
+    assert response.mimetype == "application/octet-stream"
+    assert response.headers["X-Array"] == "frames"
+    assert response.headers["X-Shape"] == "2,3,4"
+    assert response.headers["X-Failed"] == "1,4"
+
+    array = np.frombuffer(response.get_data(), dtype="<f4").reshape((2, 3, 4))
+    assert np.array_equal(array, frames)
+
+def test_npy():
+    response = respond("application/x-npy")
+    assert response.mimetype == "application/x-npy"
+    assert response.headers["X-Shape"] == "2,3,4"
+
+    array = np.load(io.BytesIO(response.get_data()))
+    assert array.dtype == np.float32
+    assert np.array_equal(array, frames)
+
+def test_preferred_type_wins():
+    response = respond("application/json;q=0.5, application/x-npy")
+    assert response.mimetype == "application/x-npy"
@@ -0,0 +1,57 @@
+import threading
+from typing import Callable
+
+class Call:
+    """
+    One in-flight computation that any number of callers can wait on.
+    """
+    done: threading.Event
+    result: object
+    error: Exception
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key.
+    The first caller runs the function, callers arriving while it runs wait for
+    and share its result (or its exception) instead of running it again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = dict()
+
+    def do(self, key: str, fn: Callable):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = Call()
+                self.calls[key] = call
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as inst:
+                call.error = inst
+            finally:
+                # later callers start a fresh computation (or hit the cache)
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+
+        return call.result
+
+    def in_flight(self) -> int:
+        with self.lock:
+            return len(self.calls)
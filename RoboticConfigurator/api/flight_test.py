@@ -0,0 +1,63 @@
+import threading
+import time
+from flight import SingleFlight
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("a", fn))) for _ in range(4)]
+    for t in threads:
+        t.start()
+
+    # let every thread join the call before it finishes
+    time.sleep(0.2)
+    assert flight.in_flight() == 1
+    release.set()
+
+    for t in threads:
+        t.join(5)
+
+    assert results == [1, 1, 1, 1]
+    assert flight.in_flight() == 0
+
+    # finished calls are not reused
+    assert flight.do("a", fn) == 2
+
+def test_errors_are_shared():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise Exception("failed")
+
+    errors = []
+    def call():
+        try:
+            flight.do("a", fn)
+        except Exception as inst:
+            errors.append(inst.args[0])
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for t in threads:
+        t.start()
+
+    time.sleep(0.2)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert errors == ["failed", "failed"]
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
@@ -0,0 +1,16 @@
+# Production settings: gunicorn -c gunicorn.conf.py app:app
+import gc
+import os
+
+bind = os.environ.get("ROLLY_BIND", "0.0.0.0:5000")
+# jobs and in-flight searches live in the worker process, the job API needs a single worker.
+# Only raise ROLLY_WORKERS when just the synchronous endpoints are used
+workers = int(os.environ.get("ROLLY_WORKERS", 1))
+threads = int(os.environ.get("ROLLY_THREADS", 8))
+
+# import and warm up the app once in the master, workers share it copy-on-write
+preload_app = True
+
+def pre_fork(server, worker):
+    # keeps the collector from touching (and so copying) the objects the preloaded app made
+    gc.freeze()
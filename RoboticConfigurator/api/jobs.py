@@ -0,0 +1,221 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+class QueueFull(Exception):
+    pass
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    """
+    One background search. Progress events are appended to events and waiters on
+    changed are woken up whenever something new happens.
+    """
+    id: str
+    status: str # queued, running, done, failed or cancelled
+    result: dict
+    error: str
+    events: list
+    created_at: float
+    finished_at: float
+    cancel_requested: threading.Event
+    changed: threading.Condition
+    last_progress_at: float
+    key: str
+    cancel_tokens: set
+
+    def __init__(self, key: str = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.cancel_tokens = set()
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.events = []
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_requested = threading.Event()
+        self.changed = threading.Condition()
+        self.last_progress_at = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def publish(self, event: dict):
+        with self.changed:
+            self.events.append(event)
+            self.changed.notify_all()
+
+    def finish(self, status: str, result: dict = None, error: str = None):
+        with self.changed:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self.events.append({"stage": status})
+            self.changed.notify_all()
+
+    def wait_for_events(self, start: int, timeout: float) -> list:
+        """
+        Events from index start on, waiting up to timeout seconds if there are none yet.
+        """
+        with self.changed:
+            if len(self.events) <= start and not self.finished:
+                self.changed.wait(timeout)
+            return self.events[start:]
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "message": self.error,
+            "progress": self.events[-1] if len(self.events) > 0 else None,
+        }
+
+class JobManager:
+    """
+    Runs searches on a fixed pool of worker threads.
+    The threads share the GIL with each other and the web server, so more workers let more
+    jobs progress at once without adding CPU throughput.
+
+    At most max_workers jobs run at once and at most max_queued wait behind them,
+    submit raises QueueFull past that so callers can back off.
+    Finished jobs are kept for keep_finished seconds so their results can be fetched.
+
+    Submitting with the key of a job that is still queued or running attaches to that
+    job instead of starting another search. Every submission gets its own cancel token,
+    and the shared job is only cancelled once every token has been used.
+    """
+    run: Callable
+    max_workers: int
+    max_queued: int
+    keep_finished: float
+    progress_interval: float
+
+    def __init__(self, run: Callable, max_workers: int = 2, max_queued: int = 16, keep_finished: float = 60 * 60, progress_interval: float = 0.5):
+        """
+        run: Called as run(progress, **params) on a worker thread, returns the job result.
+            progress must be called regularly, it publishes events and raises JobCancelled.
+        """
+        if max_workers <= 0 or max_queued < 0:
+            raise Exception("max_workers must be greater than 0 and max_queued can't be negative")
+
+        self.run = run
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self.progress_interval = progress_interval
+
+        self.jobs = dict()
+        self.active_keys = dict()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+
+    def submit(self, key: str = None, run: Callable = None, **params) -> tuple:
+        """
+        Returns (job, cancel token of this submission).
+        run: Runs this job instead of the manager's run, called the same way.
+        """
+        token = uuid.uuid4().hex
+
+        with self.lock:
+            self.expire()
+
+            running = self.active_keys.get(key) if key is not None else None
+            if running is not None and not running.finished and not running.cancel_requested.is_set():
+                running.cancel_tokens.add(token)
+                return (running, token)
+
+            active = len([j for j in self.jobs.values() if not j.finished])
+            if active >= self.max_workers + self.max_queued:
+                raise QueueFull("Too many searches are queued, try again later.")
+
+            job = Job(key)
+            job.cancel_tokens.add(token)
+            self.jobs[job.id] = job
+            if key is not None:
+                self.active_keys[key] = job
+
+        self.executor.submit(self.execute, job, run if run is not None else self.run, params)
+        return (job, token)
+
+    def get(self, job_id: str) -> Job:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str, token: str) -> Job:
+        """
+        Withdraw the submission the token was handed out for, the job is cancelled once
+        no submission is left. Finished jobs are returned unchanged.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+
+        with self.lock:
+            if job.finished:
+                return job
+
+            if token not in job.cancel_tokens:
+                raise Exception("This cancel token does not belong to the job")
+
+            job.cancel_tokens.remove(token)
+            if len(job.cancel_tokens) > 0:
+                return job
+
+            if self.active_keys.get(job.key) is job:
+                del self.active_keys[job.key]
+
+        job.cancel_requested.set()
+
+        # queued jobs never start, running jobs stop at their next progress call
+        with job.changed:
+            if job.status == "queued":
+                job.finish("cancelled")
+
+        return job
+
+    def execute(self, job: Job, run: Callable, params: dict):
+        with job.changed:
+            if job.finished:
+                return
+            job.status = "running"
+
+        job.publish({"stage": "running"})
+
+        def progress(event: dict):
+            if job.cancel_requested.is_set():
+                raise JobCancelled()
+
+            # candidate events arrive far faster than anyone can read them
+            now = time.time()
+            if event.get("stage") == "candidate" and now - job.last_progress_at < self.progress_interval:
+                return
+
+            job.last_progress_at = now
+            job.publish(event)
+
+        try:
+            result = run(progress, **params)
+        except JobCancelled:
+            job.finish("cancelled")
+        except Exception as inst:
+            job.finish("failed", error=str(inst.args[0]) if len(inst.args) > 0 else str(inst))
+        else:
+            job.finish("done", result=result)
+        finally:
+            with self.lock:
+                if self.active_keys.get(job.key) is job:
+                    del self.active_keys[job.key]
+
+    def expire(self):
+        now = time.time()
+        for (job_id, job) in list(self.jobs.items()):
+            if job.finished and now - job.finished_at > self.keep_finished:
+                del self.jobs[job_id]
@@ -0,0 +1,133 @@
+import threading
+import pytest
+from jobs import JobManager, QueueFull
+
+def wait_finished(job, timeout: float = 5):
+    with job.changed:
+        job.changed.wait_for(lambda: job.finished, timeout)
+    assert job.finished
+
+class Blocking:
+    """
+    Stub search that runs until released, calling progress meanwhile.
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+
+    def __call__(self, progress, **params):
+        self.calls += 1
+        self.started.set()
+        while not self.release.wait(0.01):
+            progress({"stage": "candidate"})
+        return params
+
+def test_result_and_failure():
+    def run(progress, value):
+        if value < 0:
+            raise Exception("negative")
+        return value * 2
+
+    manager = JobManager(run)
+
+    (job, _) = manager.submit(value=2)
+    wait_finished(job)
+    assert (job.status, job.result) == ("done", 4)
+    assert manager.get(job.id) is job
+
+    (job, _) = manager.submit(value=-1)
+    wait_finished(job)
+    assert (job.status, job.error) == ("failed", "negative")
+
+def test_queue_full():
+    run = Blocking()
+    manager = JobManager(run, max_workers=1, max_queued=1)
+
+    (running, _) = manager.submit(n=1)
+    (queued, _) = manager.submit(n=2)
+    with pytest.raises(QueueFull):
+        manager.submit(n=3)
+
+    run.release.set()
+    wait_finished(running)
+    wait_finished(queued)
+
+    # room again once jobs finish
+    wait_finished(manager.submit(n=4)[0])
+
+def test_cancel_queued_and_running():
+    run = Blocking()
+    manager = JobManager(run, max_workers=1, max_queued=1)
+
+    (running, running_token) = manager.submit(n=1)
+    (queued, queued_token) = manager.submit(n=2)
+    run.started.wait(5)
+
+    manager.cancel(queued.id, queued_token)
+    assert queued.status == "cancelled"
+
+    manager.cancel(running.id, running_token)
+    wait_finished(running)
+    assert running.status == "cancelled"
+
+    # the cancelled queued job never ran
+    assert run.calls == 1
+
+def test_shared_job_needs_every_cancel():
+    run = Blocking()
+    manager = JobManager(run)
+
+    (first, first_token) = manager.submit(key="a", n=1)
+    (second, second_token) = manager.submit(key="a", n=1)
+    (other, _) = manager.submit(key="b", n=1)
+    assert first is second
+    assert other is not first
+
+    manager.cancel(first.id, first_token)
+    assert not first.cancel_requested.is_set()
+
+    # one submitter can't withdraw twice
+    with pytest.raises(Exception):
+        manager.cancel(first.id, first_token)
+    assert not first.cancel_requested.is_set()
+
+    manager.cancel(first.id, second_token)
+    wait_finished(first)
+    assert first.status == "cancelled"
+
+    # a cancelled key starts over
+    (third, _) = manager.submit(key="a", n=1)
+    assert third is not first
+
+    run.release.set()
+    wait_finished(third)
+    wait_finished(other)
+    assert third.status == "done"
+
+def test_cancel_finished_job():
+    manager = JobManager(lambda progress: 1)
+
+    (job, token) = manager.submit()
+    wait_finished(job)
+
+    assert manager.cancel(job.id, token) is job
+    assert manager.cancel(job.id, "unknown") is job
+    assert job.status == "done"
+    assert not job.cancel_requested.is_set()
+
+def test_progress_events():
+    def run(progress):
+        progress({"stage": "joints", "num_joints": 2})
+        for _ in range(100):
+            progress({"stage": "candidate"})
+        return None
+
+    manager = JobManager(run, progress_interval=60)
+    (job, _) = manager.submit()
+    wait_finished(job)
+
+    # candidate events within progress_interval of the last event are dropped, the others are all kept
+    stages = [e["stage"] for e in job.events]
+    assert stages == ["running", "joints", "done"]
@@ -19,11 +19,10 @@ class Robot:
         if len(dh_parameters) > 7:
             raise Exception("DH parameters must have 7 DOF or less.")
         
-        for params in dh_parameters:
-            if params[1] < 0 or params[2] < 0:
-                raise Exception("a_i-1 and d_i must be positive")
+        if np.any(dh_parameters[:, 1:] < 0):
+            raise Exception("a_i-1 and d_i must be positive")
  
-        self.dh_parameters = np.array(dh_parameters)
+        self.dh_parameters = dh_parameters
         self.num_joints = len(dh_parameters)
 
     
\ No newline at end of file
@@ -1,8 +1,8 @@
 import math
 from typing import Tuple
 import numpy as np
-from scipy.spatial.transform import Rotation as R
 
+from . import metrics, so3
 from .Robot import Robot
 
 supported_solver_methods = ["jacobian_transpose", "jacobian_psuedo"]
@@ -28,6 +28,300 @@ def forward_kinematics(robot: Robot, thetas: np.ndarray):
     
     return translations
 
+def chain_frames(robot: Robot, thetas: np.ndarray, prefix_frames: np.ndarray = None) -> np.ndarray:
+    """
+    Every intermediate translation matrix along the chain.
+    Returns a (len(thetas), 4, 4) array, entry i is forward_kinematics(robot, thetas[:i+1]).
+
+    prefix_frames: Frames already computed for the first k joints at the same angles.
+        They are reused as is and only the remaining joints are computed.
+    """
+    to_joint = len(thetas)
+
+    if to_joint > robot.num_joints:
+        raise Exception("The number of joint angles cannot exceed the number of joints")
+    if to_joint <= 0:
+        raise Exception("The number of joint angles must be greater than 0")
+
+    frames = np.zeros((to_joint, 4, 4))
+    start = 0
+
+    if prefix_frames is not None:
+        start = min(len(prefix_frames), to_joint)
+        frames[:start] = prefix_frames[:start]
+
+    for i in range(start, to_joint):
+        t_matrix = build_t_matrix(np.append(robot.dh_parameters[i], thetas[i]))
+        frames[i] = t_matrix if i == 0 else np.dot(frames[i - 1], t_matrix)
+
+    return frames
+
+@metrics.timed("fk_batch")
+def forward_kinematics_batch(robot: Robot, thetas: np.ndarray) -> np.ndarray:
+    """
+    chain_frames for many joint configurations at once.
+    thetas: (M, num_joints) joint angles.
+    Returns a (M, num_joints, 4, 4) array, entry [m, i] is the frame of joint i in configuration m.
+    """
+    thetas = np.array(thetas, dtype=float)
+
+    if len(thetas.shape) != 2 or thetas.shape[1] != robot.num_joints:
+        raise Exception("Please provide an angle for each joint in every configuration")
+
+    t_matrices = build_t_matrices(robot.dh_parameters, thetas)
+
+    frames = np.zeros(t_matrices.shape)
+    frames[:, 0] = t_matrices[:, 0]
+    for i in range(1, robot.num_joints):
+        frames[:, i] = np.matmul(frames[:, i - 1], t_matrices[:, i])
+
+    return frames
+
+@metrics.timed("ik_batch")
+def inverse_kinematics_batch(
+    robot: Robot,
+    target_positions: np.ndarray = None,
+    target_orientations: np.ndarray = None,
+    initial_thetas: np.ndarray = None,
+    allowed_pos_error: float = 0.1,
+    allowed_ori_error: float = 0.01,
+    max_iterations: int = 100,
+    max_step: float = math.radians(10),
+    damping: float = 0.5,
+    restarts: int = 5,
+    rng: np.random.Generator = None,
+    max_total_iterations: int = None) -> tuple:
+    """
+    Damped least squares IK for many targets. Each target is warm started from the previous
+    solution, so nearby targets converge in a few steps. A target that is not reached from
+    there gets up to restarts more tries from random joint angles.
+    Positions outside the robot's reach bounds fail without being solved.
+
+    target_positions: (M, 3) positions, target_orientations: (M, 3, 3) rotation matrices.
+    initial_thetas: Joint angles the first target starts from, defaults to all zeros.
+    rng: Generator for the random restarts.
+    max_total_iterations: Iterations shared by every target, targets left once they are
+        used up fail. Unlimited by default.
+    Returns ((M, num_joints) joint angles, indexes of the targets that failed). Failed rows are NaN.
+    """
+    (target_positions, target_orientations, num_targets) = verify_targets(target_positions, target_orientations)
+    verify_solver_settings(robot, initial_thetas, allowed_pos_error, allowed_ori_error, max_iterations, max_step)
+
+    if restarts < 0:
+        raise Exception("restarts must be greater than or equal to 0")
+
+    if max_total_iterations is not None and max_total_iterations < 0:
+        raise Exception("max_total_iterations must be greater than or equal to 0")
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # workspace imports this module, so it can only be imported once both are loaded
+    from .workspace import find_max_reach, find_min_reach
+
+    in_reach = np.full(num_targets, True)
+    if target_positions is not None:
+        radii = np.linalg.norm(target_positions, axis=1)
+        in_reach = (radii >= find_min_reach(robot) - allowed_pos_error) & (radii <= find_max_reach(robot) + allowed_pos_error)
+
+    budget = math.inf if max_total_iterations is None else max_total_iterations
+
+    thetas = np.full((num_targets, robot.num_joints), np.nan)
+    failed = []
+    previous = np.zeros(robot.num_joints) if initial_thetas is None else np.array(initial_thetas, dtype=float)
+
+    for i in range(num_targets):
+        target_position = target_positions[i] if target_positions is not None else None
+        target_orientation = target_orientations[i] if target_orientations is not None else None
+
+        reached = False
+        start = previous
+        for _ in range(restarts + 1):
+            if not in_reach[i] or budget <= 0:
+                break
+
+            (ths, reached, iterations) = damped_least_squares(
+                robot, start, target_position, target_orientation,
+                allowed_pos_error, allowed_ori_error, int(min(max_iterations, budget)), max_step, damping)
+            budget -= max(iterations, 1)
+            if reached:
+                break
+
+            start = rng.uniform(-1 * math.pi, math.pi, robot.num_joints)
+
+        if not reached:
+            failed.append(i)
+            continue
+
+        thetas[i] = ths
+        previous = ths
+
+    return (thetas, failed)
+
+@metrics.timed("trajectory")
+def track_trajectory(
+    robot: Robot,
+    target_positions: np.ndarray = None,
+    target_orientations: np.ndarray = None,
+    initial_thetas: np.ndarray = None,
+    allowed_pos_error: float = 0.1,
+    allowed_ori_error: float = 0.01,
+    max_iterations: int = 20,
+    max_step: float = math.radians(10),
+    max_joint_jump: float = math.radians(30),
+    damping: float = 0.5) -> tuple:
+    """
+    Follow a dense path of waypoints, solving each one from the previous solution.
+
+    Every waypoint takes a few damped_least_squares steps. A waypoint fails if it is not
+    within tolerance after max_iterations, or if reaching it moves a joint more than
+    max_joint_jump from the previous waypoint (the solver jumped to another IK branch).
+    Failed waypoints are skipped, the next one starts from the last good solution.
+    Without initial_thetas there is nothing to jump from until the first waypoint is
+    tracked, so the jump check starts after it.
+
+    target_positions: (M, 3) positions, target_orientations: (M, 3, 3) rotation matrices.
+    initial_thetas: Joint angles at the start of the path, defaults to all zeros.
+    Returns ((M, num_joints) joint angles, indexes of the waypoints that failed). Failed rows are NaN.
+    """
+    (target_positions, target_orientations, num_waypoints) = verify_targets(target_positions, target_orientations)
+    verify_solver_settings(robot, initial_thetas, allowed_pos_error, allowed_ori_error, max_iterations, max_step)
+
+    if max_joint_jump <= 0:
+        raise Exception("max_joint_jump must be greater than 0")
+
+    thetas = np.full((num_waypoints, robot.num_joints), np.nan)
+    failed = []
+    previous = np.zeros(robot.num_joints) if initial_thetas is None else np.array(initial_thetas, dtype=float)
+    anchored = initial_thetas is not None
+
+    for i in range(num_waypoints):
+        (ths, reached, _) = damped_least_squares(
+            robot,
+            previous,
+            target_positions[i] if target_positions is not None else None,
+            target_orientations[i] if target_orientations is not None else None,
+            allowed_pos_error, allowed_ori_error, max_iterations, max_step, damping)
+
+        if not reached or (anchored and np.amax(np.abs(ths - previous)) > max_joint_jump):
+            failed.append(i)
+            continue
+
+        thetas[i] = ths
+        previous = ths
+        anchored = True
+
+    return (thetas, failed)
+
+def damped_least_squares(
+    robot: Robot,
+    initial_thetas: np.ndarray,
+    target_position: np.ndarray,
+    target_orientation: np.ndarray,
+    allowed_pos_error: float,
+    allowed_ori_error: float,
+    max_iterations: int,
+    max_step: float,
+    damping: float) -> tuple:
+    """
+    Step from initial_thetas towards one target with J^T (J J^T + damping^2 I)^-1 err,
+    each step scaled down so no joint moves more than max_step.
+    Either target may be None, only the given parts are solved for.
+    Returns (joint angles, whether the target is within tolerance, number of steps taken).
+    """
+    # rows of the error (and jacobian) that are solved for
+    rows = np.concatenate((
+        np.full(3, target_position is not None),
+        np.full(3, target_orientation is not None)))
+    damping_matrix = damping ** 2 * np.eye(np.count_nonzero(rows))
+
+    ths = np.array(initial_thetas, dtype=float)
+    frames = chain_frames(robot, ths)
+
+    for iteration in range(max_iterations + 1):
+        err = pose_error(frames[-1], target_position, target_orientation)
+
+        if np.linalg.norm(err[:3]) <= allowed_pos_error and np.linalg.norm(err[3:]) <= allowed_ori_error:
+            return (ths, True, iteration)
+
+        if iteration == max_iterations:
+            break
+
+        j = jacobian_from_frames(frames)[rows]
+        d_th = j.T.dot(np.linalg.solve(j.dot(j.T) + damping_matrix, err[rows]))
+
+        # step limit, see https://cseweb.ucsd.edu/classes/wi17/cse169-a/slides/CSE169_09.pdf
+        ths = ths + d_th * (max_step / max(max_step, np.amax(np.abs(d_th))))
+        frames = chain_frames(robot, ths)
+
+    return (ths, False, max_iterations)
+
+def verify_targets(target_positions: np.ndarray, target_orientations: np.ndarray) -> tuple:
+    """
+    Check a list of targets. Returns (positions, orientations, number of targets) as float arrays.
+    """
+    if target_positions is None and target_orientations is None:
+        raise Exception("Either target_positions or target_orientations must be specified")
+
+    if target_positions is not None:
+        target_positions = np.array(target_positions, dtype=float)
+        if len(target_positions.shape) != 2 or target_positions.shape[1] != 3:
+            raise Exception("target_positions must be a list of vectors (x,y,z) given in base coordinates")
+
+    if target_orientations is not None:
+        target_orientations = np.array(target_orientations, dtype=float)
+        if len(target_orientations.shape) != 3 or target_orientations.shape[1:] != (3, 3):
+            raise Exception("target_orientations must be a list of 3x3 rotation matrices")
+
+    if target_positions is not None and target_orientations is not None and len(target_positions) != len(target_orientations):
+        raise Exception("target_positions and target_orientations must have the same length")
+
+    num_targets = len(target_positions) if target_positions is not None else len(target_orientations)
+
+    return (target_positions, target_orientations, num_targets)
+
+def verify_solver_settings(robot: Robot, initial_thetas: np.ndarray, allowed_pos_error: float, allowed_ori_error: float, max_iterations: int, max_step: float):
+    if allowed_pos_error <= 0 or allowed_ori_error <= 0:
+        raise Exception("allowed_pos_error/allowed_ori_error must be a value larger than 0")
+
+    if max_iterations <= 0 or max_step <= 0:
+        raise Exception("max_iterations and max_step must be greater than 0")
+
+    if initial_thetas is not None and len(initial_thetas) != robot.num_joints:
+        raise Exception("Please provide an initial angle for each joint")
+
+def jacobian_from_frames(frames: np.ndarray) -> np.ndarray:
+    """
+    Geometric jacobian of the chain end from its chain_frames, joint i turns around the
+    z axis of frame i. Works on any number of leading batch dimensions:
+    frames: (..., N, 4, 4). Returns a (..., 6, N) array, linear rows first.
+    """
+    axes = frames[..., :3, 2]
+    origins = frames[..., :3, 3]
+    end = origins[..., -1:, :]
+
+    linear = np.cross(axes, end - origins)
+
+    return np.concatenate((linear, axes), axis=-1).swapaxes(-1, -2)
+
+def pose_error(actual_translation: np.ndarray, target_position: np.ndarray = None, target_orientation: np.ndarray = None) -> np.ndarray:
+    """
+    (position error, orientation error as a rotation vector) from actual_translation to the
+    target, both in base coordinates. Parts without a target are zero.
+    Works on stacks too: (..., 4, 4) translations, (..., 3) positions and (..., 3, 3) orientations.
+    """
+    actual_translation = np.asarray(actual_translation)
+    err = np.zeros(actual_translation.shape[:-2] + (6,))
+
+    if target_position is not None:
+        err[..., :3] = target_position - actual_translation[..., :3, -1]
+
+    if target_orientation is not None:
+        err[..., 3:] = so3.rotation_error(target_orientation, actual_translation[..., :3, :3])
+
+    return err
+
+@metrics.timed("ik_solve")
 def inverse_kinematics(
     robot: Robot,
     target_position: np.ndarray = None,
@@ -35,7 +329,15 @@ def inverse_kinematics(
     solver_method: str = "jacobian_transpose", 
     allowed_pos_error: float = 0.1,
     allowed_ori_error: float = 0.1,
-    restart_threshold: int = 1) -> np.array:
+    restart_threshold: int = 1,
+    initial_thetas: np.ndarray = None,
+    rng: np.random.Generator = None,
+    initial_frames: np.ndarray = None) -> np.array:
+    """
+    initial_thetas: Joint angles to start from, defaults to all zeros.
+    rng: Generator for the random restarts.
+    initial_frames: Precomputed chain_frames at the starting angles, skips the first FK.
+    """
 
     if target_position is None and target_orientation is None:
         raise Exception("Either target_position or target_orientation must be specified")
@@ -55,6 +357,9 @@ def inverse_kinematics(
     if solver_method not in supported_solver_methods:
         raise Exception("The solver method provided is not supported.")
 
+    if initial_thetas is not None and len(initial_thetas) != robot.num_joints:
+        raise Exception("Please provide an initial angle for each joint")
+
     # build target translation matrix
     if target_position is None:
         target_position = np.zeros(3)
@@ -72,13 +377,26 @@ def inverse_kinematics(
 
     target_translation = assemble_t_matrix(target_orientation, target_position)
 
+    # random restarts draw from rng so seeded callers get repeatable answers
+    if rng is None:
+        rng = np.random.default_rng()
+
     # set constants
     d_th_threshold = math.radians(5) # limit to 5 degrees
     err_sim_count_threshold = 100
 
-    # start calculation at theta = 0
-    ths = np.zeros(robot.num_joints)
-    actual = forward_kinematics(robot, ths)
+    # start calculation at theta = 0 unless warm started
+    if initial_thetas is None:
+        ths = np.zeros(robot.num_joints)
+    else:
+        ths = np.array(initial_thetas, dtype=float)
+
+    if initial_frames is not None and len(initial_frames) == robot.num_joints:
+        frames = np.array(initial_frames)
+    else:
+        frames = chain_frames(robot, ths)
+
+    actual = frames[-1]
     err = err_between_t(
         target_translation, 
         actual, 
@@ -108,8 +426,9 @@ def inverse_kinematics(
                 raise Exception("Unable to meet the tolerance threshold")
 
             # restart with random thetas
-            ths = np.random.normal(0, math.pi, robot.num_joints)
-            actual = forward_kinematics(robot, ths)
+            ths = rng.normal(0, math.pi, robot.num_joints)
+            frames = chain_frames(robot, ths)
+            actual = frames[-1]
             err = err_between_t(
                 target_translation, 
                 actual, 
@@ -125,7 +444,7 @@ def inverse_kinematics(
         match solver_method:
             case "jacobian_transpose":
                 # caculate jacobian
-                j = calc_jacobian(robot, ths)
+                j = calc_jacobian(robot, ths, frames=frames)
 
                 # calculate inverse of jacobian as the transpose
                 j_tp = np.transpose(j)
@@ -135,7 +454,7 @@ def inverse_kinematics(
                 d_th = j_tp.dot(scaled_err)
             case "jacobian_psuedo":
                 # caculate jacobian
-                j = calc_jacobian(robot, ths)
+                j = calc_jacobian(robot, ths, frames=frames)
 
                 # calculate psuedoinverse
                 j_tp = np.linalg.pinv(j)
@@ -154,7 +473,8 @@ def inverse_kinematics(
         # ths = ths + a * d_th
 
         # recalc pose and error
-        actual = forward_kinematics(robot, ths)
+        frames = chain_frames(robot, ths)
+        actual = frames[-1]
         err = err_between_t(
             target_translation, 
             actual, 
@@ -167,7 +487,10 @@ def inverse_kinematics(
 
     return ths
 
-def calc_jacobian(robot: Robot, thetas: np.ndarray, final_pos: np.ndarray = None, j_type: str = "geometric"):
+def calc_jacobian(robot: Robot, thetas: np.ndarray, final_pos: np.ndarray = None, j_type: str = "geometric", frames: np.ndarray = None):
+    """
+    frames: chain_frames at thetas, computed here if not given.
+    """
     if thetas.shape[0] != robot.num_joints:
         raise Exception("Please provide an angle for each joint")
 
@@ -179,8 +502,11 @@ def calc_jacobian(robot: Robot, thetas: np.ndarray, final_pos: np.ndarray = None
 
     mlt = np.array([0, 0, 1])
 
+    if frames is None:
+        frames = chain_frames(robot, thetas)
+
     if final_pos is None:
-        final_pos = forward_kinematics(robot, thetas)[:3, -1]
+        final_pos = frames[-1][:3, -1]
 
     jacobian = []
 
@@ -190,9 +516,7 @@ def calc_jacobian(robot: Robot, thetas: np.ndarray, final_pos: np.ndarray = None
     jacobian.append(init_col)
 
     for i in range(1, robot.num_joints):
-        # TODO optimize this so it doesn't have to recalculate the intermediate
-        # translation matrices each time
-        t_mat = forward_kinematics(robot, thetas[:i])
+        t_mat = frames[i - 1]
         r_mat = t_mat[:3, :3]
         p_vec = t_mat[:3, -1]
 
@@ -230,6 +554,32 @@ def build_t_matrix(full_dh: np.ndarray) -> np.ndarray:
         [0, 0, 0, 1],
     ])
 
+def build_t_matrices(dh_parameters: np.ndarray, thetas: np.ndarray) -> np.ndarray:
+    """
+    Vectorized build_t_matrix for every joint of every configuration.
+    dh_parameters: (N, 3) DH parameters, thetas: (M, N) joint angles.
+    Returns a (M, N, 4, 4) array.
+    """
+    (al, a, d) = np.transpose(dh_parameters)
+    (c_al, s_al) = (np.cos(al), np.sin(al))
+    (c_th, s_th) = (np.cos(thetas), np.sin(thetas))
+
+    t = np.zeros(thetas.shape + (4, 4))
+    t[..., 0, 0] = c_th
+    t[..., 0, 1] = -1 * s_th
+    t[..., 0, 3] = a
+    t[..., 1, 0] = s_th * c_al
+    t[..., 1, 1] = c_th * c_al
+    t[..., 1, 2] = -1 * s_al
+    t[..., 1, 3] = -1 * s_al * d
+    t[..., 2, 0] = s_th * s_al
+    t[..., 2, 1] = c_th * s_al
+    t[..., 2, 2] = c_al
+    t[..., 2, 3] = c_al * d
+    t[..., 3, 3] = 1
+
+    return t
+
 def err_between_t(
     target_translation: np.ndarray,
     actual_translation: np.ndarray, 
@@ -243,37 +593,11 @@ def err_between_t(
     if solver_method not in supported_solver_methods:
         raise Exception("The solver method provided is not supported.")
 
-    pos_err = np.zeros(3)
-    rot_err = np.zeros(3)
-
-    act_pos = actual_translation[:3, -1]
-    act_rot = actual_translation[:3, :3]
-
-    ex_pos = target_translation[:3, -1]
-    ex_rot = target_translation[:3, :3]
-
-    # Calculate error in position
-    if not disable_position:
-        pos_err = ex_pos - act_pos
-
-    # Calculate error in orientation
-    if not disable_orientation:
-        match solver_method:
-            case "jacobian_transpose":
-                # Get diff in terms of a rot matrix
-                rot_diff = act_rot.transpose() * ex_rot
-
-                # Translate diff to angle-axis representation
-                rot_err = R.from_matrix(rot_diff).as_rotvec()
-
-            case "jacobian_psuedo":
-                # Get diff in terms of a rot matrix
-                rot_diff = act_rot.transpose() * ex_rot
-
-                # Translate diff to angle-axis representation
-                rot_err = R.from_matrix(rot_diff).as_rotvec()
-
-    return np.concatenate((pos_err, rot_err))
+    # both solvers use the same error, in base coordinates like the jacobian
+    return pose_error(
+        actual_translation,
+        target_position=None if disable_position else target_translation[:3, -1],
+        target_orientation=None if disable_orientation else target_translation[:3, :3])
 
 def assemble_t_matrix(rotation_matrix: np.ndarray, position_vector: np.ndarray):
     """
@@ -283,6 +607,19 @@ def assemble_t_matrix(rotation_matrix: np.ndarray, position_vector: np.ndarray):
     res = np.concatenate((rotation_matrix, np.array([position_vector]).transpose()), axis=1)
     return np.concatenate((res, np.array([(0, 0, 0, 1)])))
 
+def warmup():
+    """
+    Import and run everything lazily loaded so the cost isn't paid by the first request.
+    Call it before forking workers so they share the result.
+    """
+    robot = Robot(np.array([(0, 1, 0), (math.pi / 2, 1, 1)]))
+    thetas = np.zeros((1, robot.num_joints))
+
+    forward_kinematics_batch(robot, thetas)
+    calc_jacobian(robot, thetas[0])
+    err_between_t(np.eye(4), np.eye(4))
+    so3.euler_to_matrix("xyz", np.zeros((1, 3)))
+
 def x_rot_matrix(theta: float) -> np.ndarray:
     """
     Create elementary matrix for rotation around X axis
@@ -1,6 +1,6 @@
 import math
 import numpy as np
-from .core import forward_kinematics, inverse_kinematics
+from .core import chain_frames, forward_kinematics, forward_kinematics_batch, inverse_kinematics, inverse_kinematics_batch, jacobian_from_frames, track_trajectory
 from .Robot import Robot
 
 # def test_fk():
@@ -125,3 +125,115 @@ def test_ik_position_simple():
 #     round_pos = np.round(calc_pos, 1)
 
 #     np.testing.assert_allclose(round_pos, t_goal[:3,-1])
+
+def test_fk_batch():
+    r = Robot(np.array([
+        (0, 0, 0),
+        (-1 * math.pi / 2, 1, 2),
+        (math.pi / 2, 3, 0),
+    ]))
+
+    thetas = np.random.default_rng(0).normal(0, math.pi, (5, 3))
+    frames = forward_kinematics_batch(r, thetas)
+
+    assert frames.shape == (5, 3, 4, 4)
+    for (th, fr) in zip(thetas, frames):
+        np.testing.assert_allclose(fr, chain_frames(r, th), atol=1e-9)
+        np.testing.assert_allclose(fr[-1], forward_kinematics(r, th), atol=1e-9)
+
+def test_jacobian_from_frames():
+    r = Robot(np.array([
+        (0, 0, 0),
+        (-1 * math.pi / 2, 1, 2),
+        (math.pi / 3, 3, 1),
+    ]))
+
+    thetas = np.array([0.3, -0.7, 1.1])
+    jacobian = jacobian_from_frames(chain_frames(r, thetas))
+
+    # compare the linear rows with finite differences
+    eps = 1e-6
+    end = forward_kinematics(r, thetas)[:3, -1]
+    for i in range(r.num_joints):
+        moved = thetas.copy()
+        moved[i] += eps
+        np.testing.assert_allclose(jacobian[:3, i], (forward_kinematics(r, moved)[:3, -1] - end) / eps, atol=1e-4)
+
+def test_track_trajectory():
+    r = Robot(np.array([
+        (0, 0, 0),
+        (-1 * math.pi / 2, 1, 2),
+        (math.pi / 2, 3, 0),
+    ]))
+
+    # a smooth path the robot can follow
+    start = np.array([0.2, 0.4, -0.3])
+    path = np.array([start + 0.5 * math.sin(t) for t in np.linspace(0, math.pi, 200)])
+    frames = forward_kinematics_batch(r, path)[:, -1]
+
+    positions = frames[:, :3, -1]
+    positions[100] = (100, 0, 0) # out of reach
+
+    (thetas, failed) = track_trajectory(r, positions, frames[:, :3, :3], initial_thetas=start, allowed_pos_error=0.01)
+
+    assert failed == [100]
+    assert np.all(np.isnan(thetas[100]))
+
+    reached = np.delete(np.arange(len(path)), failed)
+    actual = forward_kinematics_batch(r, thetas[reached])[:, -1]
+    np.testing.assert_allclose(actual[:, :3, -1], positions[reached], atol=0.01)
+    np.testing.assert_allclose(actual[:, :3, :3], frames[reached, :3, :3], atol=0.02)
+
+def test_track_trajectory_without_initial_thetas():
+    r = Robot(np.array([
+        (0, 0, 0),
+        (0, 100, 0),
+        (0, 100, 0),
+    ]))
+
+    positions = np.array([(150, 50, 0), (140, 60, 0), (130, 70, 0)])
+    (thetas, failed) = track_trajectory(r, positions)
+
+    assert failed == []
+    actual = forward_kinematics_batch(r, thetas)[:, -1, :3, -1]
+    np.testing.assert_allclose(actual, positions, atol=0.1)
+
+def test_ik_batch():
+    r = Robot(np.array([
+        (0, 0, 0),
+        (-1 * math.pi / 2, 1, 2),
+        (math.pi / 2, 3, 0),
+    ]))
+
+    goals = np.random.default_rng(0).uniform(-1 * math.pi, math.pi, (5, 3))
+    frames = forward_kinematics_batch(r, goals)[:, -1]
+
+    positions = frames[:, :3, -1]
+    positions[2] = (100, 0, 0) # out of reach
+
+    (thetas, failed) = inverse_kinematics_batch(r, positions, frames[:, :3, :3], allowed_pos_error=0.01, rng=np.random.default_rng(0))
+
+    assert failed == [2]
+    assert np.all(np.isnan(thetas[2]))
+
+    reached = np.delete(np.arange(len(goals)), failed)
+    actual = forward_kinematics_batch(r, thetas[reached])[:, -1]
+    np.testing.assert_allclose(actual[:, :3, -1], positions[reached], atol=0.01)
+    np.testing.assert_allclose(actual[:, :3, :3], frames[reached, :3, :3], atol=0.02)
+
+def test_ik_batch_skips_out_of_reach_and_stops_at_the_budget():
+    r = Robot(np.array([
+        (0, 0, 0),
+        (-1 * math.pi / 2, 1, 2),
+        (math.pi / 2, 3, 0),
+    ]))
+
+    goals = np.random.default_rng(1).uniform(-1 * math.pi, math.pi, (4, 3))
+    positions = forward_kinematics_batch(r, goals)[:, -1, :3, -1]
+    positions[3] = (100, 0, 0)
+
+    (thetas, failed) = inverse_kinematics_batch(r, positions, max_total_iterations=0)
+    assert failed == [0, 1, 2, 3]
+
+    (thetas, failed) = inverse_kinematics_batch(r, positions, allowed_pos_error=0.01, max_total_iterations=10000, rng=np.random.default_rng(0))
+    assert failed == [3]
@@ -0,0 +1,119 @@
+import threading
+import time
+from contextlib import ContextDecorator
+
+# upper bounds in seconds, from a single FK call to a full search
+default_buckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60, 300)
+
+class Histogram:
+    buckets: tuple
+    counts: list
+    sum: float
+    count: int
+
+    def __init__(self, buckets: tuple = default_buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+
+        for (i, bound) in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+class Registry:
+    """
+    Per-process counters and per-stage latency histograms.
+    Rendered in the Prometheus text format by render.
+    """
+    counters: dict
+    histograms: dict
+
+    def __init__(self):
+        self.counters = dict()
+        self.histograms = dict()
+        self.lock = threading.Lock()
+
+    def inc(self, event: str, value: int = 1):
+        with self.lock:
+            self.counters[event] = self.counters.get(event, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = Histogram()
+                self.histograms[stage] = histogram
+
+            histogram.observe(seconds)
+
+    def timed(self, stage: str) -> "Timer":
+        return Timer(self, stage)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self, prefix: str = "rolly") -> str:
+        lines = []
+
+        with self.lock:
+            lines.append("# TYPE " + prefix + "_stage_seconds histogram")
+            for (stage, histogram) in sorted(self.histograms.items()):
+                cumulative = 0
+                for (bound, count) in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(prefix + '_stage_seconds_bucket{stage="' + stage + '",le="' + str(bound) + '"} ' + str(cumulative))
+                lines.append(prefix + '_stage_seconds_bucket{stage="' + stage + '",le="+Inf"} ' + str(histogram.count))
+                lines.append(prefix + '_stage_seconds_sum{stage="' + stage + '"} ' + repr(histogram.sum))
+                lines.append(prefix + '_stage_seconds_count{stage="' + stage + '"} ' + str(histogram.count))
+
+            lines.append("# TYPE " + prefix + "_events_total counter")
+            for (event, count) in sorted(self.counters.items()):
+                lines.append(prefix + '_events_total{event="' + event + '"} ' + str(count))
+
+        return "\n".join(lines) + "\n"
+
+class Timer(ContextDecorator):
+    """
+    Records the time spent in a with block (or decorated function) under stage.
+    Exceptions are counted as the event "<stage>_errors" and passed on.
+    """
+
+    def __init__(self, registry: Registry, stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.local = threading.local()
+
+    def __enter__(self):
+        # a decorated function can run on several threads (and recursively) at once
+        starts = getattr(self.local, "starts", None)
+        if starts is None:
+            starts = []
+            self.local.starts = starts
+
+        starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.local.starts.pop())
+
+        if exc_type is not None:
+            self.registry.inc(self.stage + "_errors")
+
+        return False
+
+# shared by dummy, rolly and the api
+registry = Registry()
+
+def timed(stage: str) -> Timer:
+    return registry.timed(stage)
+
+def inc(event: str, value: int = 1):
+    registry.inc(event, value)
@@ -0,0 +1,39 @@
+import pytest
+from .metrics import Histogram, Registry
+
+def test_histogram_buckets():
+    h = Histogram((0.1, 1))
+    h.observe(0.05)
+    h.observe(0.5)
+    h.observe(5)
+
+    assert h.counts == [1, 1]
+    assert h.count == 3
+    assert h.sum == pytest.approx(5.55)
+
+def test_timer_records_stage_and_errors():
+    registry = Registry()
+
+    @registry.timed("stage")
+    def fails():
+        raise ValueError()
+
+    with registry.timed("stage"):
+        pass
+
+    with pytest.raises(ValueError):
+        fails()
+
+    assert registry.histograms["stage"].count == 2
+    assert registry.counters["stage_errors"] == 1
+
+def test_render():
+    registry = Registry()
+    registry.observe("fk", 0.002)
+    registry.inc("candidates", 3)
+
+    text = registry.render()
+    assert 'rolly_stage_seconds_bucket{stage="fk",le="0.001"} 0' in text
+    assert 'rolly_stage_seconds_bucket{stage="fk",le="0.005"} 1' in text
+    assert 'rolly_stage_seconds_count{stage="fk"} 1' in text
+    assert 'rolly_events_total{event="candidates"} 3' in text
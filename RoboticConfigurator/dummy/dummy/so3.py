@@ -0,0 +1,103 @@
+import numpy as np
+
+# below this angle the log map uses the series expansion of theta / sin(theta)
+small_angle = 1e-6
+
+# above this angle sin(theta) is too small to recover the axis from the skew part
+large_angle = np.pi - 1e-3
+
+def euler_to_matrix(seq: str, angles: np.ndarray, degrees: bool = False) -> np.ndarray:
+    """
+    Rotation matrices from Euler angles, following the scipy Rotation.from_euler conventions.
+
+    seq: Up to 3 axes, lowercase (e.g. "xyz") for extrinsic rotations around the fixed
+        base axes, uppercase (e.g. "XYZ") for intrinsic rotations around the rotating axes.
+    angles: (..., len(seq)) angles, one per axis.
+    Returns a (..., 3, 3) array.
+    """
+    if len(seq) < 1 or len(seq) > 3 or not (seq.islower() or seq.isupper()) or any(axis not in "xyz" for axis in seq.lower()):
+        raise Exception("Euler sequence must be 1 to 3 of the axes x, y, z, all lowercase (extrinsic) or all uppercase (intrinsic)")
+
+    angles = np.array(angles, dtype=float)
+    if angles.ndim == 0 or angles.shape[-1] != len(seq):
+        raise Exception("Please provide an angle for each axis of the Euler sequence")
+
+    if degrees:
+        angles = np.radians(angles)
+
+    mats = np.broadcast_to(np.eye(3), angles.shape[:-1] + (3, 3))
+    for (i, axis) in enumerate(seq.lower()):
+        rotation = axis_rotations(axis, angles[..., i])
+
+        # extrinsic rotations apply on the left, intrinsic ones on the right
+        mats = np.matmul(mats, rotation) if seq.isupper() else np.matmul(rotation, mats)
+
+    return mats
+
+def axis_rotations(axis: str, angles: np.ndarray) -> np.ndarray:
+    """
+    Elementary rotations around the x, y or z axis, (...) angles to (..., 3, 3) matrices.
+    """
+    (c, s) = (np.cos(angles), np.sin(angles))
+    (i, j) = {"x": (1, 2), "y": (2, 0), "z": (0, 1)}[axis]
+    k = 3 - i - j
+
+    mats = np.zeros(np.shape(angles) + (3, 3))
+    mats[..., k, k] = 1
+    mats[..., i, i] = c
+    mats[..., i, j] = -1 * s
+    mats[..., j, i] = s
+    mats[..., j, j] = c
+
+    return mats
+
+def log(mats: np.ndarray) -> np.ndarray:
+    """
+    Rotation vectors (axis * angle, angle in [0, pi]) of (..., 3, 3) rotation matrices.
+    Returns a (..., 3) array, the same as scipy Rotation.from_matrix(mats).as_rotvec().
+    """
+    mats = np.asarray(mats, dtype=float)
+
+    # sin(theta) * axis and cos(theta)
+    skew = 0.5 * np.stack((
+        mats[..., 2, 1] - mats[..., 1, 2],
+        mats[..., 0, 2] - mats[..., 2, 0],
+        mats[..., 1, 0] - mats[..., 0, 1]), axis=-1)
+    cos = np.clip(0.5 * (np.trace(mats, axis1=-2, axis2=-1) - 1), -1, 1)
+    sin = np.linalg.norm(skew, axis=-1)
+    theta = np.arctan2(sin, cos)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(theta < small_angle, 1 + theta ** 2 / 6, theta / sin)
+    rotvecs = skew * scale[..., np.newaxis]
+
+    large = theta > large_angle
+    if np.any(large):
+        rotvecs[large] = log_near_pi(mats[large], skew[large], cos[large], theta[large])
+
+    return rotvecs
+
+def log_near_pi(mats: np.ndarray, skew: np.ndarray, cos: np.ndarray, theta: np.ndarray) -> np.ndarray:
+    """
+    log for (M, 3, 3) rotations close to pi, where the axis comes from the symmetric part:
+    (R + R^T) / 2 - cos(theta) I = (1 - cos(theta)) axis axis^T.
+    """
+    outer = 0.5 * (mats + np.swapaxes(mats, -1, -2)) - cos[:, np.newaxis, np.newaxis] * np.eye(3)
+
+    # the column with the largest diagonal entry is the best conditioned
+    rows = np.arange(len(mats))
+    k = np.argmax(np.diagonal(outer, axis1=-2, axis2=-1), axis=-1)
+    axes = outer[rows, :, k] / np.sqrt(outer[rows, k, k] * (1 - cos))[:, np.newaxis]
+
+    # the symmetric part loses the sign of the axis, the skew part still has it
+    flip = np.sum(axes * skew, axis=-1) < 0
+    axes[flip] *= -1
+
+    return axes * theta[:, np.newaxis]
+
+def rotation_error(target: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """
+    Rotation vectors, in base coordinates, that turn the (..., 3, 3) actual rotations
+    into the target rotations: log(target actual^T).
+    """
+    return log(np.matmul(target, np.swapaxes(actual, -1, -2)))
@@ -0,0 +1,53 @@
+import math
+import numpy as np
+import pytest
+from scipy.spatial.transform import Rotation as R
+from .so3 import euler_to_matrix, log, rotation_error
+
+@pytest.mark.parametrize("seq", ["xyz", "zyx", "zyz", "XYZ", "ZYX", "ZXZ", "xy", "Z"])
+def test_euler_to_matrix_matches_scipy(seq):
+    angles = np.random.default_rng(0).uniform(-math.pi, math.pi, (20, len(seq)))
+
+    np.testing.assert_allclose(euler_to_matrix(seq, angles), R.from_euler(seq, angles).as_matrix(), atol=1e-12)
+    np.testing.assert_allclose(euler_to_matrix(seq, angles[0]), R.from_euler(seq, angles[0]).as_matrix(), atol=1e-12)
+
+def test_euler_to_matrix_degrees():
+    np.testing.assert_allclose(euler_to_matrix("xyz", (90, 0, 0), degrees=True), euler_to_matrix("xyz", (math.pi / 2, 0, 0)))
+
+def test_euler_to_matrix_rejects_bad_input():
+    with pytest.raises(Exception):
+        euler_to_matrix("xYz", (0, 0, 0))
+    with pytest.raises(Exception):
+        euler_to_matrix("xyz", (0, 0))
+
+def test_log_matches_scipy():
+    rng = np.random.default_rng(1)
+    rotvecs = R.random(50, random_state=1).as_rotvec()
+
+    # include the identity, tiny angles and angles at and close to pi
+    axes = rng.normal(0, 1, (4, 3))
+    axes /= np.linalg.norm(axes, axis=1)[:, np.newaxis]
+    rotvecs = np.concatenate((
+        rotvecs,
+        np.zeros((1, 3)),
+        axes * 1e-9,
+        axes * math.pi,
+        axes * (math.pi - 1e-5),
+        axes * (math.pi - 1e-2)))
+
+    mats = R.from_rotvec(rotvecs).as_matrix()
+    expected = R.from_matrix(mats).as_rotvec()
+    actual = log(mats)
+
+    # at exactly pi the axis sign is arbitrary
+    at_pi = np.isclose(np.linalg.norm(expected, axis=1), math.pi)
+    actual[at_pi] *= np.sign(np.sum(actual[at_pi] * expected[at_pi], axis=1))[:, np.newaxis]
+
+    np.testing.assert_allclose(actual, expected, atol=1e-7)
+
+def test_rotation_error():
+    actual = R.random(10, random_state=2).as_matrix()
+    target = R.random(10, random_state=3).as_matrix()
+
+    err = rotation_error(target, actual)
+    np.testing.assert_allclose(np.matmul(R.from_rotvec(err).as_matrix(), actual), target, atol=1e-9)
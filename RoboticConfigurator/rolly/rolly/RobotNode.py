@@ -3,19 +3,124 @@ import numpy as np
 from dummy.Robot import Robot
 from dummy.workspace import find_max_reach, find_min_reach
 
-def create_node(dh_parameters: np.ndarray):
-    params = np.array(dh_parameters)
-    r = Robot(params)
-    return RobotNode(r, uuid.uuid4(), find_min_reach(r), find_max_reach(r))
+def create_node(dh_parameters: np.ndarray, min_reach: float = None, max_reach: float = None):
+    """
+    min_reach/max_reach: Precomputed reach bounds (from a PrefixNode), computed on first use if not given.
+    """
+    node = RobotNode(dh_parameters)
+
+    if min_reach is not None and max_reach is not None:
+        object.__setattr__(node, "cached_reach", (min_reach, max_reach))
+
+    return node
 
 class RobotNode:
-    uuid: str
-    min_reach: int
-    max_reach: int
-    robot: Robot
-
-    def __init__(self, robot: Robot, uuid: str, min_reach: int, max_reach: int):
-        self.uuid = uuid
-        self.min_reach = min_reach
-        self.max_reach = max_reach
-        self.robot = robot
\ No newline at end of file
+    """
+    One candidate robot, identified by its DH parameters.
+
+    Immutable, hashed and compared by its DH parameters, so nodes can be used as dict keys
+    and sets of nodes deduplicate equal robots. dh_parameters is kept as given when it is a
+    read-only array, so nodes can be views into one array shared by many candidates.
+
+    The Robot (which validates the DH parameters), uuid and reach bounds are only computed
+    when first used, most candidates are discarded before that. A pickled node carries its
+    DH parameters, uuid and reach bounds, nothing else.
+
+    reach_source: Object with min_reach/max_reach for these DH parameters (like a PrefixNode),
+        used instead of computing them from the robot.
+    """
+    __slots__ = ("dh_parameters", "reach_source", "cached_robot", "cached_uuid", "cached_reach", "cached_hash")
+
+    dh_parameters: np.ndarray
+
+    def __init__(self, dh_parameters: np.ndarray, reach_source=None):
+        dh_parameters = np.asarray(dh_parameters, dtype=float)
+
+        # never share an array someone else can still write to
+        if dh_parameters.flags.writeable:
+            dh_parameters = dh_parameters.copy()
+            dh_parameters.setflags(write=False)
+
+        object.__setattr__(self, "dh_parameters", dh_parameters)
+        object.__setattr__(self, "reach_source", reach_source)
+        object.__setattr__(self, "cached_robot", None)
+        object.__setattr__(self, "cached_uuid", None)
+        object.__setattr__(self, "cached_reach", None)
+        object.__setattr__(self, "cached_hash", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RobotNode is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RobotNode is immutable")
+
+    @property
+    def num_joints(self) -> int:
+        return len(self.dh_parameters)
+
+    @property
+    def robot(self) -> Robot:
+        if self.cached_robot is None:
+            object.__setattr__(self, "cached_robot", Robot(self.dh_parameters))
+
+        return self.cached_robot
+
+    @property
+    def uuid(self) -> uuid.UUID:
+        if self.cached_uuid is None:
+            object.__setattr__(self, "cached_uuid", uuid.uuid4())
+
+        return self.cached_uuid
+
+    @property
+    def min_reach(self) -> float:
+        return self.reach[0]
+
+    @property
+    def max_reach(self) -> float:
+        return self.reach[1]
+
+    @property
+    def reach(self) -> tuple:
+        """
+        (min_reach, max_reach)
+        """
+        if self.cached_reach is None:
+            if self.reach_source is not None:
+                reach = (self.reach_source.min_reach, self.reach_source.max_reach)
+            else:
+                reach = (find_min_reach(self.robot), find_max_reach(self.robot))
+
+            object.__setattr__(self, "cached_reach", reach)
+
+        return self.cached_reach
+
+    def __hash__(self) -> int:
+        if self.cached_hash is None:
+            # hashing the values (not the bytes) keeps 0.0 and -0.0 equal
+            object.__setattr__(self, "cached_hash", hash((self.dh_parameters.shape, tuple(self.dh_parameters.ravel().tolist()))))
+
+        return self.cached_hash
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RobotNode):
+            return NotImplemented
+
+        return self is other or (hash(self) == hash(other) and np.array_equal(self.dh_parameters, other.dh_parameters))
+
+    def __reduce__(self):
+        # the reach source (and the rest of its trie) stays behind, its bounds are cheap to copy
+        reach = self.cached_reach
+        if reach is None and self.reach_source is not None:
+            reach = self.reach
+
+        return (restore_node, (self.dh_parameters.tolist(), self.cached_uuid, reach))
+
+    def __repr__(self) -> str:
+        return "RobotNode(" + repr(self.dh_parameters.tolist()) + ")"
+
+def restore_node(dh_parameters: list, node_uuid: uuid.UUID = None, reach: tuple = None) -> RobotNode:
+    node = RobotNode(dh_parameters)
+    object.__setattr__(node, "cached_uuid", node_uuid)
+    object.__setattr__(node, "cached_reach", reach)
+    return node
@@ -0,0 +1,62 @@
+import pickle
+import numpy as np
+import pytest
+from dummy.workspace import find_max_reach, find_min_reach
+from .prefix import PrefixTrie
+from .RobotNode import RobotNode, create_node
+
+dhs = [(np.pi / 2, 100, 0), (0, 300, 200), (-np.pi / 2, 0, 500)]
+
+def test_structural_equality():
+    a = RobotNode(np.array(dhs))
+    b = create_node(dhs)
+    c = RobotNode(np.array(dhs[:2]))
+
+    assert a == b and hash(a) == hash(b)
+    assert a != c
+    assert len({a, b, c}) == 2
+    assert a.uuid != b.uuid
+
+def test_immutable():
+    params = np.array(dhs)
+    node = RobotNode(params)
+
+    # a writable input is copied, so later changes don't leak into the node
+    params[0, 1] = 0
+    assert node.dh_parameters[0, 1] == 100
+
+    with pytest.raises(ValueError):
+        node.dh_parameters[0, 1] = 0
+    with pytest.raises(AttributeError):
+        node.reach_source = None
+
+def test_view_of_shared_array():
+    candidates = np.array([dhs, dhs])
+    candidates.setflags(write=False)
+
+    node = RobotNode(candidates[1])
+    assert np.shares_memory(node.dh_parameters, candidates)
+
+def test_lazy_reach_and_validation():
+    node = create_node(dhs)
+    assert node.cached_robot is None and node.cached_reach is None
+
+    assert node.min_reach == find_min_reach(node.robot)
+    assert node.max_reach == find_max_reach(node.robot)
+
+    # invalid parameters only fail once the robot is needed
+    invalid = RobotNode(np.array([(0, -100, 0)]))
+    with pytest.raises(Exception):
+        invalid.robot
+
+def test_pickle():
+    chain_node = PrefixTrie().node(dhs)
+    node = RobotNode(np.array(dhs), reach_source=chain_node)
+    node.uuid
+
+    copy = pickle.loads(pickle.dumps(node))
+
+    assert copy == node
+    assert copy.uuid == node.uuid
+    assert copy.reach == (chain_node.min_reach, chain_node.max_reach)
+    assert copy.reach_source is None
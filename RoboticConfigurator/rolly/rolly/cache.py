@@ -0,0 +1,157 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+from dummy import so3
+
+# bump when the search space or the search itself changes so old answers are dropped
+cache_version = 2
+
+# quantization applied before hashing a problem
+position_decimals = 1 # 0.1 mm
+rotation_decimals = 6
+
+def problem_key(
+    points_only: np.ndarray = np.array([]),
+    orientations_only: np.ndarray = np.array([]),
+    points_with_orientation: dict = dict(),
+    euler_seq: str = "xyz") -> str:
+    """
+    Stable hash of a search problem.
+
+    Points are rounded, orientations are converted to rotation matrices (so the same
+    rotation written in a different euler_seq gets the same key) and every target list
+    is sorted and deduplicated, matching what search does with its input.
+    """
+    points = quantize_points(np.array(points_only, dtype=float).reshape((-1, 3)))
+
+    orientations = np.array(orientations_only, dtype=float).reshape((-1, 3))
+    orientation_mats = quantize_rotations(orientations, euler_seq)
+
+    pose_points = quantize_points(np.array(list(points_with_orientation.keys()), dtype=float).reshape((-1, 3)))
+    pose_mats = quantize_rotations(np.array(list(points_with_orientation.values()), dtype=float).reshape((-1, 3)), euler_seq)
+    poses = np.concatenate((pose_points, pose_mats), axis=1)
+
+    normalized = {
+        "version": cache_version,
+        "points": unique_rows(points),
+        "orientations": unique_rows(orientation_mats),
+        "poses": unique_rows(poses),
+    }
+
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def seed_from_key(key: str) -> int:
+    """
+    Deterministic RNG seed for a problem key.
+    """
+    return int(key[:16], 16)
+
+def quantize_points(points: np.ndarray) -> np.ndarray:
+    # adding 0.0 turns -0.0 into 0.0 so both hash the same
+    return np.round(points, position_decimals) + 0.0
+
+def quantize_rotations(orientations: np.ndarray, euler_seq: str) -> np.ndarray:
+    if orientations.shape[0] == 0:
+        return np.zeros((0, 9))
+
+    mats = so3.euler_to_matrix(euler_seq, orientations).reshape((-1, 9))
+    return np.round(mats, rotation_decimals) + 0.0
+
+def unique_rows(rows: np.ndarray) -> list:
+    if rows.shape[0] == 0:
+        return []
+
+    return np.unique(rows, axis=0).tolist()
+
+class SearchCache:
+    """
+    Persistent search results in a local SQLite database, keyed by problem_key.
+    Entries expire after ttl seconds and the least recently used entries are
+    evicted once there are more than max_entries.
+    """
+    path: str
+    ttl: float
+    max_entries: int
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 60 * 60, max_entries: int = 10000):
+        if ttl <= 0 or max_entries <= 0:
+            raise Exception("ttl and max_entries must be greater than 0")
+
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS results (
+                        key TEXT PRIMARY KEY,
+                        dh_parameters TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+        finally:
+            conn.close()
+
+    def connect(self) -> sqlite3.Connection:
+        # one connection per operation keeps the cache safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key: str):
+        """
+        Return the cached DH parameters for key, or None if missing or expired.
+        """
+        now = time.time()
+
+        conn = self.connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT dh_parameters FROM results WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl)).fetchone()
+
+                if row is None:
+                    return None
+
+                conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        finally:
+            conn.close()
+
+        return np.array(json.loads(row[0]))
+
+    def set(self, key: str, dh_parameters: np.ndarray):
+        now = time.time()
+
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, dh_parameters, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(np.array(dh_parameters).tolist()), now, now))
+
+                # evict expired then least recently used entries
+                conn.execute("DELETE FROM results WHERE created_at <= ?", (now - self.ttl,))
+                conn.execute("""
+                    DELETE FROM results WHERE key IN (
+                        SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM results")
+        finally:
+            conn.close()
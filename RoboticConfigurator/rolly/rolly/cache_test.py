@@ -0,0 +1,50 @@
+import math
+import time
+import numpy as np
+from .cache import SearchCache, problem_key
+
+def test_problem_key_normalized():
+    p1 = np.array([(1,2,3),(4,5,6)])
+    p2 = np.array([(4,5,6),(1,2,3),(1.00001,2,3)])
+    assert problem_key(points_only=p1) == problem_key(points_only=p2)
+
+    # Same rotation written with a different sequence
+    o1 = np.array([(math.pi / 2, 0, 0)])
+    o2 = np.array([(0, 0, math.pi / 2)])
+    assert problem_key(orientations_only=o1, euler_seq="xyz") == problem_key(orientations_only=o2, euler_seq="zyx")
+
+    # Negation
+    assert problem_key(points_only=p1) != problem_key(points_only=p1 + 1)
+    assert problem_key(points_only=p1) != problem_key(orientations_only=p1)
+    assert problem_key(points_with_orientation={(1,2,3): np.zeros(3)}) != problem_key(points_only=np.array([(1,2,3)]))
+
+def test_search_cache(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    dh = np.array([(0, 100, 0), (math.pi / 2, 0, 200)])
+
+    assert cache.get("a") is None
+
+    cache.set("a", dh)
+    np.testing.assert_allclose(cache.get("a"), dh)
+
+    # Shared between instances
+    np.testing.assert_allclose(SearchCache(cache.path).get("a"), dh)
+
+    # Least recently used entry is evicted
+    time.sleep(0.01)
+    cache.set("b", dh)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", dh)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+def test_search_cache_ttl(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"), ttl=0.01)
+    cache.set("a", np.zeros((1, 3)))
+
+    time.sleep(0.02)
+    assert cache.get("a") is None
@@ -0,0 +1,74 @@
+import numpy as np
+
+class TargetStats:
+    """
+    Running count of how often each target rejected a candidate robot.
+    Targets that reject the most candidates are checked first.
+    """
+    rejections: np.ndarray
+
+    def __init__(self, num_targets: int):
+        self.rejections = np.zeros(num_targets, dtype=int)
+
+    def record(self, target: int):
+        self.rejections[target] += 1
+
+    def order(self, targets: np.ndarray) -> np.ndarray:
+        """
+        Sort targets from most to least discriminating.
+        Ties keep their input order.
+        """
+        targets = np.asarray(targets, dtype=int)
+        return targets[np.argsort(-self.rejections[targets], kind="stable")]
+
+class FailureMemo:
+    """
+    Remembers which position targets each robot chain failed to reach.
+
+    A trailing link with a_i-1 = 0 and d_i = 0 only rotates the end frame, so the chain
+    reaches exactly the positions its prefix reaches. Any chain made by appending
+    such links to a chain that failed a position target fails that target too.
+
+    Failures are kept under the chain without its trailing zero length links, and only
+    for chains shorter than max_links (longer ones are never extended). At most
+    max_chains chains are kept, the oldest are dropped first.
+    """
+    failed: dict
+    max_links: int
+    max_chains: int
+
+    def __init__(self, max_links: int = None, max_chains: int = 50000):
+        self.failed = dict()
+        self.max_links = max_links
+        self.max_chains = max_chains
+
+    def record(self, dh_parameters: np.ndarray, target: int):
+        if self.max_links is not None and len(dh_parameters) >= self.max_links:
+            return
+
+        key = position_key(dh_parameters)
+        if key not in self.failed and len(self.failed) >= self.max_chains:
+            # chains are enumerated in order, the oldest is the least likely to be extended again
+            del self.failed[next(iter(self.failed))]
+
+        self.failed.setdefault(key, set()).add(target)
+
+    def known_failures(self, dh_parameters: np.ndarray) -> set:
+        """
+        The position targets the chain (or the prefixes it extends) is known to fail.
+        """
+        return self.failed.get(position_key(dh_parameters), set())
+
+def chain_key(dh_parameters: np.ndarray) -> tuple:
+    return tuple(tuple(dh) for dh in np.asarray(dh_parameters, dtype=float).tolist())
+
+def position_key(dh_parameters: np.ndarray) -> tuple:
+    """
+    chain_key without the trailing links that do not move the end position.
+    """
+    key = chain_key(dh_parameters)
+
+    while len(key) > 0 and key[-1][1] == 0 and key[-1][2] == 0:
+        key = key[:-1]
+
+    return key
@@ -0,0 +1,54 @@
+import numpy as np
+from .memo import FailureMemo, TargetStats
+
+def test_target_stats_order():
+    stats = TargetStats(4)
+
+    # No rejections keeps the input order
+    np.testing.assert_array_equal(stats.order([0,1,2,3]), [0,1,2,3])
+
+    stats.record(2)
+    stats.record(2)
+    stats.record(3)
+
+    np.testing.assert_array_equal(stats.order([0,1,2,3]), [2,3,0,1])
+    np.testing.assert_array_equal(stats.order([0,1]), [0,1])
+
+def test_failure_memo():
+    memo = FailureMemo()
+    memo.record(np.array([(0, 100, 0), (0, 100, 200)]), 3)
+
+    assert memo.known_failures(np.array([(0, 100, 0), (0, 100, 200)])) == {3}
+
+    # Failures of the chain and its prefixes are combined
+    memo.record(np.array([(0, 100, 0), (0, 100, 200), (0, 0, 0)]), 1)
+    assert memo.known_failures(np.array([(0, 100, 0), (0, 100, 200), (0, 0, 0)])) == {1, 3}
+
+    # Zero length links don't move the end position, so they share the failures
+    assert memo.known_failures(np.array([(0, 100, 0), (0, 100, 200), (np.pi / 2, 0, 0)])) == {1, 3}
+    assert memo.known_failures(np.array([(0, 100, 0), (0, 100, 200)])) == {1, 3}
+    assert memo.known_failures(np.array([(0, 100, 0), (0, 100, 200), (0, 0, 0), (0, 0, 0)])) == {1, 3}
+
+    # Longer links can reach new positions
+    assert memo.known_failures(np.array([(0, 100, 0), (0, 100, 200), (0, 100, 0)])) == set()
+    assert memo.known_failures(np.array([(0, 100, 0)])) == set()
+
+def test_failure_memo_only_keeps_extendable_chains():
+    memo = FailureMemo(max_links=3, max_chains=2)
+
+    # nothing longer is enumerated, so nothing would read it
+    memo.record(np.array([(0, 100, 0), (0, 100, 200), (0, 0, 0)]), 1)
+    assert memo.failed == dict()
+
+    # a zero length link shares its prefix's entry
+    memo.record(np.array([(0, 100, 0)]), 1)
+    memo.record(np.array([(0, 100, 0), (0, 0, 0)]), 2)
+    memo.record(np.array([(0, 200, 0)]), 3)
+    assert len(memo.failed) == 2
+    assert memo.known_failures(np.array([(0, 100, 0)])) == {1, 2}
+
+    # the oldest chain is dropped first
+    memo.record(np.array([(0, 300, 0)]), 4)
+    assert len(memo.failed) == 2
+    assert memo.known_failures(np.array([(0, 100, 0), (0, 0, 0)])) == set()
+    assert memo.known_failures(np.array([(0, 200, 0), (0, 0, 0)])) == {3}
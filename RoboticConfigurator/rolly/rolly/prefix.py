@@ -0,0 +1,91 @@
+import numpy as np
+
+from dummy.core import build_t_matrix
+
+class PrefixNode:
+    """
+    One DH prefix shared by every candidate chain that starts with it.
+
+    frames: chain_frames of the prefix with every joint at 0, the IK starting pose.
+    max_reach: find_max_reach of the prefix.
+    min_partials: The leaves find_min_reach walks through, min(min_partials) is the min reach.
+    """
+    dh: tuple
+    depth: int
+    frames: np.ndarray
+    max_reach: float
+    min_partials: np.ndarray
+    children: dict
+    last_child: "PrefixNode"
+
+    def __init__(self, dh: tuple, depth: int, frames: np.ndarray, max_reach: float, min_partials: np.ndarray):
+        self.dh = dh
+        self.depth = depth
+        self.frames = frames
+        self.max_reach = max_reach
+        self.min_partials = min_partials
+        self.children = dict()
+        self.last_child = None
+
+    @property
+    def min_reach(self) -> float:
+        return float(np.min(self.min_partials))
+
+    def extend(self, dh: tuple) -> "PrefixNode":
+        """
+        The node for this prefix with one more link, built from this node's results.
+        """
+        frame = build_t_matrix(np.append(dh, 0))
+        if self.depth > 0:
+            frame = np.dot(self.frames[-1], frame)
+
+        link_max = max(dh[1:3])
+        link_min = min(dh[1:3])
+
+        if self.depth == 0:
+            min_partials = np.array([link_min], dtype=float)
+        else:
+            min_partials = np.unique(np.concatenate((np.abs(self.min_partials - link_min), self.min_partials + link_min)))
+
+        return PrefixNode(
+            dh,
+            self.depth + 1,
+            np.concatenate((self.frames, [frame])),
+            self.max_reach + link_max,
+            min_partials)
+
+class PrefixTrie:
+    """
+    Trie of DH prefixes. Candidates are enumerated in order, so once the walk moves on
+    to a new child the previous child's subtree is dropped. Memory stays bounded by
+    the chain depth times the number of distinct links.
+    """
+    root: PrefixNode
+
+    def __init__(self):
+        self.root = PrefixNode((), 0, np.zeros((0, 4, 4)), 0, np.zeros(0))
+
+    def node(self, dh_parameters: list) -> PrefixNode:
+        """
+        Walk (and extend) the trie along dh_parameters, reusing every cached prefix.
+        """
+        node = self.root
+        for dh in dh_parameters:
+            node = self.child(node, tuple(dh))
+
+        return node
+
+    def child(self, node: PrefixNode, dh: tuple) -> PrefixNode:
+        child = node.children.get(dh)
+
+        if child is None:
+            child = node.extend(dh)
+            node.children[dh] = child
+
+        # the walk left the previous child, its subtree won't be visited again soon
+        if node.last_child is not None and node.last_child is not child:
+            node.last_child.children.clear()
+            node.last_child.last_child = None
+        node.last_child = child
+
+        return child
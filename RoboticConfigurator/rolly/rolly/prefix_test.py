@@ -0,0 +1,31 @@
+import numpy as np
+from dummy.core import chain_frames
+from dummy.Robot import Robot
+from dummy.workspace import find_max_reach, find_min_reach
+from .prefix import PrefixTrie
+
+def test_prefix_node_matches_robot():
+    dhs = [(np.pi / 2, 100, 0), (0, 300, 200), (-np.pi / 2, 0, 500), (0, 100, 100)]
+    r = Robot(np.array(dhs))
+
+    node = PrefixTrie().node(dhs)
+
+    np.testing.assert_almost_equal(node.max_reach, find_max_reach(r))
+    np.testing.assert_almost_equal(node.min_reach, find_min_reach(r))
+    np.testing.assert_allclose(node.frames, chain_frames(r, np.zeros(len(dhs))), atol=1e-9)
+
+def test_prefix_trie_shares_prefix():
+    trie = PrefixTrie()
+    prefix = [(0, 100, 0), (0, 200, 0)]
+
+    a = trie.node(prefix + [(0, 100, 0)])
+    b = trie.node(prefix + [(0, 0, 300)])
+    shared = trie.node(prefix)
+
+    assert shared.children[(0, 100, 0)] is a
+    assert shared.children[(0, 0, 300)] is b
+    np.testing.assert_allclose(a.frames[:2], shared.frames)
+
+    # Moving on to a new prefix drops the old subtree
+    trie.node([(0, 100, 0), (0, 300, 0)])
+    assert len(shared.children) == 0
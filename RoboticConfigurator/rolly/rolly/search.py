@@ -1,11 +1,18 @@
+import hashlib
 import math
+from typing import Callable
 import numpy as np
-from scipy.spatial.transform import Rotation as R
 
 from dummy.core import inverse_kinematics, x_rot_matrix
+from dummy.core import warmup as warmup_dummy
+from dummy import metrics, so3
 
+from .cache import SearchCache, problem_key, seed_from_key
+from .memo import FailureMemo, TargetStats
+from .prefix import PrefixNode, PrefixTrie
+from .targets import SearchProblem, TargetSet
 from .RobotNode import RobotNode, create_node
-from .utils import points_equal_distant, points_share_plane
+from .utils import points_equal_distant, points_on_planes, points_share_plane
 
 # Boundaries
 min_num_joints = 1
@@ -19,6 +26,9 @@ alpha_rots = [x_rot_matrix(a) for a in np.unique(np.abs(allowed_alphas), axis=0)
 allowed_alpha_uvs_z = np.round(np.array([a.dot(np.array((0,0,1))) for a in alpha_rots]))
 allowed_alpha_uvs_x = np.round(np.array([a.dot(np.array((1,0,0))) for a in alpha_rots]))
 
+# normals of every plane through the base origin spanned by an allowed z and x unit vector
+allowed_alpha_plane_normals = np.cross(allowed_alpha_uvs_z[:, None], allowed_alpha_uvs_x[None, :]).reshape((-1, 3))
+
 dh_params = []
 for alpha in allowed_alphas:
     for a_len in range(0, max_dh_param_size, dh_param_step_size):
@@ -26,6 +36,23 @@ for alpha in allowed_alphas:
             dh = (alpha, a_len, d_len)
             dh_params.append(dh)
 
+# longest reach a single link can add
+max_link_reach = max([max(dh[1:3]) for dh in dh_params])
+
+# every last link at once, candidates sharing a prefix are rows of one array
+dh_params_array = np.array(dh_params, dtype=float)
+
+# stage timers, created once since they run for every candidate
+pre_analysis_timer = metrics.timed("pre_analysis")
+enumeration_timer = metrics.timed("enumeration")
+reach_pruning_timer = metrics.timed("reach_pruning")
+
+# the tables above are constants, read-only so no caller changes them by accident.
+# This doesn't keep forked workers from copying them, only the gc.freeze in the api gunicorn config helps with that
+for table in (allowed_alphas, allowed_alpha_uvs_z, allowed_alpha_uvs_x, allowed_alpha_plane_normals, dh_params_array):
+    table.setflags(write=False)
+dh_params = tuple(dh_params)
+
 """
 Just points:
 - 1 Joint: Points equal distance from center and lie on a plane [allowed_alphas] degrees 
@@ -44,6 +71,11 @@ Points & orientation:
     from origin and all orientations match exactly the required angle to reach the corresponding point 
 - 2 Joints: All points share a plane that is either [allowed_alphas] degrees from
     origin and all orientations 
+- Otherwise: the larger of the points and the orientations joint counts, each is
+    the fewest joints needed for its targets alone
+
+Points with orientation are searched position-first, full pose IK only runs
+on robots that already reach every position.
 
 Future work:
 - If points / desired workspace looks more like a rectangular prism, use a cartesian robot
@@ -54,83 +86,215 @@ def search(
     points_only: np.ndarray = np.array([]), 
     orientations_only: np.ndarray = np.array([]), 
     points_with_orientation: dict = dict(),
-    euler_seq: str = "xyz") -> RobotNode:
+    euler_seq: str = "xyz",
+    seed: int = None,
+    cache: SearchCache = None,
+    progress: Callable[[dict], None] = None) -> RobotNode:
+    """
+    Find the first robot that reaches every target.
+
+    seed: Seeds the IK random restarts. Defaults to a seed derived from the normalized
+        problem, so the same problem always gives the same robot.
+    cache: Optional SearchCache, answers for problems seen before are returned without searching.
+    progress: Optional callback, called with a dict describing each step of the search.
+        Raising inside the callback stops the search with that exception.
+    """
     
     verify_search_input(points_only, orientations_only, points_with_orientation)
-    
-    points = np.unique(np.array(points_only), axis=0)
-    orientations = np.unique(np.array(orientations_only), axis=0)
 
-    orientation_mats = np.array([R.from_euler(euler_seq, o).as_matrix() for o in orientations])
-    
-    start_search = max_num_joints
+    key = problem_key(points_only, orientations_only, points_with_orientation, euler_seq)
 
-    print("Beginning optimization...")
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            report(progress, stage="cached")
+            return create_node(cached)
 
-    # Only points provided
-    if orientations.shape[0] == 0 and len(points_with_orientation) == 0:
-        max_norm = np.max(np.linalg.norm(points))
+    if seed is None:
+        seed = seed_from_key(key)
+    
+    print("Beginning optimization...")
+    report(progress, stage="pre-analysis")
 
-        # determine max point size
-        for s in range(6, 2, -1):
-            ln = s * max_dh_param_size
-            if max_norm > ln:
-                start_search = s + 1
-                break
-            else:
-                start_search = s
-
-        # determine if we can go lower than 3 joints
-        if start_search == 3:
-            # Check if points share a plane [allowed_alphas] from base z
-            shared = points_share_plane(points)
-            if shared:
-                for plane_z in allowed_alpha_uvs_z:
-                    for plane_x in allowed_alpha_uvs_x:
-                        ext_pts = np.append(points, [plane_z, plane_x, (0,0,0)], axis=0)
-                        if points_share_plane(ext_pts):
-                            print(ext_pts)
-                            start_search = 2
-                            break
-
-            # Check if points equidistant from center and on a plane [allowed_alphas] from base z
-            if start_search == 2 and points_equal_distant(points):
-                start_search = 1
-        
-    # Only orientations provided
-    if points.shape[0] == 0 and len(points_with_orientation) == 0:
-        start_search = 3
-
-        # get unit vectors
-        unit_ori = np.round(np.array([o_m.dot(np.array((0,0,1))) for o_m in orientation_mats]))
-
-        # check only 1 angle change
-        for uv in allowed_alpha_uvs_z:
-            comb = np.append(unit_ori, [uv], axis=0)
-            unq = np.unique(comb, axis=0)
+    with pre_analysis_timer:
+        (start_search, points, orientation_mats, pose_points, pose_mats) = analyze_problem(points_only, orientations_only, points_with_orientation, euler_seq)
+    
+    print("Starting search with", start_search, "joint(s)")
+    robot_node = begin_search(start_search, points, orientation_mats, pose_points, pose_mats, rng=np.random.default_rng(seed), progress=progress)
+
+    if cache is not None:
+        cache.set(key, robot_node.dh_parameters)
+
+    return robot_node
+
+def search_batch(
+    problems: list,
+    seed: int = None,
+    cache: SearchCache = None,
+    progress: Callable[[dict], None] = None) -> list:
+    """
+    Solve many problems in one search.
+
+    problems: A list of dicts holding the search keyword arguments of each problem
+        (points_only, orientations_only, points_with_orientation and euler_seq).
+
+    Candidates are enumerated once for the whole batch. Each candidate is checked
+    against the union of the targets, so a target shared by several problems is
+    solved once per candidate, and the answers are mapped back to every problem.
+    A problem can get a different (equally valid) robot in a batch than when
+    searched alone, the same batch always gets the same answers.
+    Returns a RobotNode per problem, None where no robot was found.
+    """
+    if len(problems) == 0:
+        return []
+
+    problems = [{
+        "points_only": np.array(p.get("points_only", np.array([]))),
+        "orientations_only": np.array(p.get("orientations_only", np.array([]))),
+        "points_with_orientation": p.get("points_with_orientation", dict()),
+        "euler_seq": p.get("euler_seq", "xyz"),
+    } for p in problems]
+
+    for p in problems:
+        verify_search_input(p["points_only"], p["orientations_only"], p["points_with_orientation"])
+
+    keys = [problem_key(**p) for p in problems]
+
+    # the answers depend on the whole batch (candidates are checked against every
+    # problem with one rng), so they are seeded and cached per batch, never under
+    # the single problem keys search uses. Identical problems are solved once and
+    # the order of the problems doesn't matter.
+    unique_keys = sorted(set(keys))
+    batch_key = hashlib.sha256(",".join(unique_keys).encode("utf-8")).hexdigest()
+    cache_keys = {key: batch_key + ":" + key for key in unique_keys}
+
+    if cache is not None:
+        cached = [cache.get(cache_keys[key]) for key in unique_keys]
+
+        # a partly cached batch is searched again as a whole so the answers don't change
+        if all([c is not None for c in cached]):
+            report(progress, stage="cached")
+            found = {key: create_node(c) if len(c) > 0 else None for (key, c) in zip(unique_keys, cached)}
+            return [found[key] for key in keys]
+
+    if seed is None:
+        seed = seed_from_key(batch_key)
+
+    print("Beginning optimization of", len(unique_keys), "problem(s)...")
+    report(progress, stage="pre-analysis")
+
+    first = {key: problems[keys.index(key)] for key in unique_keys}
+
+    with pre_analysis_timer:
+        targets = TargetSet()
+        search_problems = [SearchProblem(targets, *analyze_problem(**first[key])) for key in unique_keys]
+        targets.freeze()
+
+    found = dict(zip(unique_keys, begin_batch_search(search_problems, targets, rng=np.random.default_rng(seed), progress=progress)))
+
+    if cache is not None:
+        # no robot is cached as an empty list
+        for (key, robot_node) in found.items():
+            cache.set(cache_keys[key], robot_node.dh_parameters if robot_node is not None else [])
+
+    return [found[key] for key in keys]
+
+def analyze_problem(
+    points_only: np.ndarray = np.array([]),
+    orientations_only: np.ndarray = np.array([]),
+    points_with_orientation: dict = dict(),
+    euler_seq: str = "xyz") -> tuple:
+    """
+    Normalize the search input and pick the starting number of joints.
+    Returns (start_joints, points, orientation matrices, pose points, pose matrices).
+    """
+    points = np.unique(np.array(points_only), axis=0).reshape((-1, 3))
+    orientations = np.unique(np.array(orientations_only), axis=0)
 
-            if unq.shape[0] == 1:
-                start_search = 1
-                break
+    orientation_mats = so3.euler_to_matrix(euler_seq, orientations.reshape((-1, 3)))
+    (pose_points, pose_mats) = split_points_with_orientation(points_with_orientation, euler_seq)
+
+    all_points = np.concatenate((points, pose_points))
+    all_orientation_mats = np.concatenate((orientation_mats, pose_mats))
+
+    # Each analysis gives the fewest joints needed for its targets alone,
+    # so a robot that reaches every target needs at least the larger of the two
+    start_joints = min_num_joints
+
+    if all_points.shape[0] > 0:
+        start_joints = max(start_joints, min_joints_for_points(all_points))
+
+    if all_orientation_mats.shape[0] > 0:
+        start_joints = max(start_joints, min_joints_for_orientations(all_orientation_mats))
+
+    return (start_joints, points, orientation_mats, pose_points, pose_mats)
+
+def split_points_with_orientation(points_with_orientation: dict, euler_seq: str = "xyz") -> tuple:
+    """
+    Split the points_with_orientation dictionary into a (N, 3) array of positions
+    and the matching (N, 3, 3) array of rotation matrices.
+    """
+    pose_points = np.array(list(points_with_orientation.keys()), dtype=float).reshape((-1, 3))
+    pose_mats = so3.euler_to_matrix(euler_seq, np.array(list(points_with_orientation.values()), dtype=float).reshape((-1, 3)))
+
+    return (pose_points, pose_mats)
+
+def min_joints_for_points(points: np.ndarray) -> int:
+    """
+    Fewest joints that can reach every point. See the table above.
+    """
+    max_norm = np.max(np.linalg.norm(points, axis=1))
+
+    # determine max point size
+    for s in range(max_num_joints, 2, -1):
+        ln = s * max_dh_param_size
+        if max_norm > ln:
+            num_joints = s + 1
+            break
+        else:
+            num_joints = s
+
+    # determine if we can go lower than 3 joints
+    if num_joints == 3:
+        # Check if points share a plane [allowed_alphas] from base z
+        shared = points_share_plane(points)
+        if shared and np.any(points_on_planes(points, allowed_alpha_plane_normals)):
+            num_joints = 2
+
+        # Check if points equidistant from center and on a plane [allowed_alphas] from base z
+        if num_joints == 2 and points_equal_distant(points):
+            num_joints = 1
+
+    return num_joints
+
+def min_joints_for_orientations(orientation_mats: np.ndarray) -> int:
+    """
+    Fewest joints that can reach every orientation. See the table above.
+    """
+    # get unit vectors
+    unit_ori = np.round(orientation_mats[:, :, 2])
+
+    # check only 1 angle change
+    for uv in allowed_alpha_uvs_z:
+        comb = np.append(unit_ori, [uv], axis=0)
+        unq = np.unique(comb, axis=0)
+
+        if unq.shape[0] == 1:
+            return 1
+
+    # check only 2 angles change
+    for i in range(allowed_alpha_uvs_z.shape[0]):
+        for k in range(allowed_alpha_uvs_z.shape[0]):
+            if i == k:
+                continue
 
-        # check only 2 angles change
-        if start_search != 1:
-            for i in range(allowed_alpha_uvs_z.shape[0]):
-                for k in range(allowed_alpha_uvs_z.shape[1]):
-                    if i == k:
-                        continue
+            comb = np.append(unit_ori, [allowed_alpha_uvs_z[i], allowed_alpha_uvs_z[k]], axis=0)
+            unq = np.unique(comb, axis=0)
 
-                    comb = np.append(unit_ori, [allowed_alpha_uvs_z[i], allowed_alpha_uvs_z[k]], axis=0)
-                    unq = np.unique(comb, axis=0)
+            if unq.shape[0] == 2:
+                return 2
 
-                    if unq.shape[0] == 2:
-                        start_search = 2
-                        break
-
-    # TODO setup optimization for points & orientation
-    
-    print("Starting search with", start_search, "joint(s)")
-    return begin_search(start_search, points, orientation_mats, points_with_orientation)
+    return 3
 
 def verify_search_input(points_only: np.ndarray, orientations_only: np.ndarray, points_with_orientation: dict):
     if points_only.shape[0] == 0 and orientations_only.shape[0] == 0 and len(points_with_orientation) == 0:
@@ -143,98 +307,250 @@ def verify_search_input(points_only: np.ndarray, orientations_only: np.ndarray,
             raise Exception("Keys must be (x,y,z) tuples and values in points_with_orientation must be euler ZYX orientations in radians")
 
     # check points and orientations
-    if points_only.shape[0] > 0 and points_only.shape[1] != 3:
+    if points_only.shape[0] > 0 and (len(points_only.shape) != 2 or points_only.shape[1] != 3):
         raise Exception("Points must be (x,y,z) vectors")
 
-    if orientations_only.shape[0] > 0 and orientations_only.shape[1] != 3:
+    if orientations_only.shape[0] > 0 and (len(orientations_only.shape) != 2 or orientations_only.shape[1] != 3):
         raise Exception("Orientations must be ZYX euler vectors")
 
 def begin_search(
     starting_num_joints: int,
     points_only: np.ndarray,
     orientations_only: np.ndarray,
-    points_with_orientation: dict) -> RobotNode:
-
-    if len(points_with_orientation) > 0:
-        all_points = np.unique(np.append(points_only, list(points_with_orientation.keys()), axis=0))
-    else:
-        all_points = points_only
+    pose_points: np.ndarray = np.zeros((0, 3)),
+    pose_orientations: np.ndarray = np.zeros((0, 3, 3)),
+    rng: np.random.Generator = None,
+    progress: Callable[[dict], None] = None) -> RobotNode:
+    """
+    Enumerate candidate robots starting at starting_num_joints and return the first
+    that reaches every target.
+    """
+    targets = TargetSet()
+    problem = SearchProblem(
+        targets,
+        starting_num_joints,
+        np.array(points_only, dtype=float).reshape((-1, 3)),
+        np.array(orientations_only, dtype=float).reshape((-1, 3, 3)),
+        pose_points,
+        pose_orientations)
+    targets.freeze()
+
+    robot_node = begin_batch_search([problem], targets, rng=rng, progress=progress)[0]
+    if robot_node is None:
+        raise Exception("Could not find robot")
+
+    return robot_node
+
+def begin_batch_search(
+    problems: list,
+    targets: TargetSet,
+    rng: np.random.Generator = None,
+    progress: Callable[[dict], None] = None) -> list:
+    """
+    Enumerate candidate robots once for every SearchProblem and return the first
+    robot that reaches all targets of each problem (None if there is none).
+
+    Pose targets are checked position-first: the cheap reach test and a position-only
+    IK solve run for every position before any full 6-DOF solve, which is warm started
+    from the position solution.
+
+    Within each stage targets are tried in order of how many candidates they have
+    rejected so far, and position failures are memoized so chains that only extend
+    a failed chain with zero length links are skipped without running IK.
+
+    Reach bounds and the zero angle frames come from a PrefixTrie, so candidates that
+    differ only in their last link reuse everything computed for the shared prefix.
+    Those candidates are rows of one read-only array, and a RobotNode (a view of its row)
+    is only made for candidates that pass the reach and memo checks.
+    """
+    found = [None] * len(problems)
+
+    has_ori = any([p.has_orientation for p in problems])
+
+    stats = TargetStats(targets.num_targets)
+    # the longest chains are never extended, their failures would not be read
+    memo = FailureMemo(max_links=max_num_joints + 1)
+    trie = PrefixTrie()
+    num_tried = 0
+
+    for n_params in range(min([p.start_joints for p in problems]) + 1, max_num_joints + 2):
+        active = [i for i in range(len(problems)) if found[i] is None and problems[i].start_joints <= n_params - 1]
+        if len(active) == 0:
+            continue
 
-    has_ori = len(orientations_only) > 0 or len(points_with_orientation) > 0
-
-    for n_params in range(starting_num_joints + 1, max_num_joints + 2):
         num_robots = len(dh_params) ** n_params
         print(num_robots, "Possible robot combinations for", n_params, "DH parameters")
+        report(progress, stage="joints", num_joints=n_params - 1, num_robots=num_robots)
 
         dhs_keys = dict()
 
-        for dh_indexes in nd_range(0, len(dh_params), n_params):
-            dhs = []
-            for dh_index in dh_indexes:
-                dhs.append(dh_params[dh_index])
+        for prefix_indexes in nd_range(0, len(dh_params), n_params - 1):
+            if len(active) == 0:
+                break
 
-            np_dhs = np.array(dhs)
-            list_dhs = np_dhs.flatten().tolist()
+            prefix = [dh_params[dh_index] for dh_index in prefix_indexes]
+            prefix_node = trie.node(prefix)
 
-            # remove unnecessary angle from last joint if orientation not needed
-            dhs_key = tuple([list_dhs[i] for i in range(0, len(list_dhs)) if has_ori or i != len(list_dhs)-3])
-            if dhs_key in dhs_keys:
+            # no last link can stretch this prefix far enough for any problem
+            if prefix_node.max_reach + max_link_reach < min([problems[i].max_radius for i in active]):
                 continue
 
-            # create robot
-            robot_node = create_node(np.array(dhs))
-            print("Trying key", dhs_key)
+            candidates = np.empty((len(dh_params), n_params, 3))
+            candidates[:, :-1] = np.array(prefix, dtype=float).reshape((-1, 3))
+            candidates[:, -1] = dh_params_array
+            candidates.setflags(write=False)
 
-            # check workspace first
-            skip = False
-            for point in all_points:
-                radi = np.linalg.norm(point)
+            for (last_index, last) in enumerate(dh_params):
+                with enumeration_timer:
+                    np_dhs = candidates[last_index]
+                    list_dhs = np_dhs.flatten().tolist()
 
-                if radi < robot_node.min_reach or radi > robot_node.max_reach:
-                    skip = True
-                    break
-            
-            if skip:
-                continue
+                    # remove unnecessary angle from last joint if orientation not needed
+                    dhs_key = tuple([list_dhs[i] for i in range(0, len(list_dhs)) if has_ori or i != len(list_dhs)-3])
+                    if dhs_key in dhs_keys:
+                        continue
 
-            # Check points
-            for point in all_points:
-                t_or = None
-                if tuple(point) in points_with_orientation:
-                    t_or = points_with_orientation[tuple(point)]
-
-                try:
-                    thetas = inverse_kinematics(
-                        robot_node.robot,
-                        target_position=point,
-                        target_orientation=t_or,
-                        allowed_pos_error=10,
-                        restart_threshold=100,
-                        solver_method="jacobian_psuedo")
-                except Exception:
-                    skip = True
-                    break
-            
-            if skip:
-                continue
+                    # reach and starting frames extend the shared prefix
+                    chain_node = trie.child(prefix_node, last)
+
+                print("Trying key", dhs_key)
+                num_tried += 1
+                metrics.inc("candidates")
+                report(progress, stage="candidate", num_joints=n_params - 1, num_tried=num_tried)
 
-            # Check remaining orientations
-            for orientation in orientations_only:
-                try:
-                    thetas = inverse_kinematics(
-                        robot_node.robot,
-                        target_orientation=orientation,
-                        allowed_pos_error=10,
-                        restart_threshold=100,
-                        solver_method="jacobian_psuedo")
-                except Exception:
-                    skip = True
+                with reach_pruning_timer:
+                    # check workspace first
+                    in_reach = (targets.radii >= chain_node.min_reach) & (targets.radii <= chain_node.max_reach)
+
+                    # a shorter chain already missed some of the positions
+                    known = memo.known_failures(np_dhs)
+
+                    eligible = []
+                    for i in active:
+                        problem = problems[i]
+
+                        if not np.all(in_reach[problem.positions]):
+                            metrics.inc("reach_pruned")
+                            continue
+
+                        missed = known.intersection(problem.positions.tolist())
+                        if len(missed) > 0:
+                            metrics.inc("memo_pruned")
+                            stats.record(min(missed))
+                            continue
+
+                        eligible.append(i)
+
+                if len(eligible) == 0:
+                    continue
+
+                robot_node = RobotNode(np_dhs, reach_source=chain_node)
+
+                # IK answers for this candidate, shared by every problem
+                solved = dict()
+
+                for i in eligible:
+                    if check_targets(robot_node, chain_node, problems[i], targets, solved, stats, memo, rng):
+                        found[i] = robot_node
+                        report(progress, stage="found", problem=i, num_joints=n_params - 1)
+
+                active = [i for i in active if found[i] is None]
+                if len(active) == 0:
                     break
-            
-            if not skip:
-                return robot_node
-                    
-    raise Exception("Could not find robot")
+
+    return found
+
+def check_targets(
+    robot_node: RobotNode,
+    chain_node: PrefixNode,
+    problem: SearchProblem,
+    targets: TargetSet,
+    solved: dict,
+    stats: TargetStats,
+    memo: FailureMemo,
+    rng: np.random.Generator) -> bool:
+    """
+    Run IK for every target of the problem, most discriminating first. Returns false on the first miss.
+    solved holds the answers for this candidate by target index, targets already in it are not solved again.
+    """
+    # Check every position, pose targets without their orientation
+    for target in stats.order(problem.positions):
+        if target not in solved:
+            try:
+                solved[target] = inverse_kinematics(
+                    robot_node.robot,
+                    target_position=targets.positions[target],
+                    allowed_pos_error=10,
+                    restart_threshold=100,
+                    solver_method="jacobian_psuedo",
+                    rng=rng,
+                    initial_frames=chain_node.frames)
+            except Exception:
+                solved[target] = None
+                stats.record(target)
+                memo.record(robot_node.dh_parameters, target)
+
+        if solved[target] is None:
+            return False
+
+    # Full pose only once every position is reachable
+    for target in stats.order(targets.pose_offset + problem.poses):
+        if target not in solved:
+            (position, orientation) = targets.poses[target - targets.pose_offset]
+            try:
+                solved[target] = inverse_kinematics(
+                    robot_node.robot,
+                    target_position=targets.positions[position],
+                    target_orientation=orientation,
+                    allowed_pos_error=10,
+                    restart_threshold=100,
+                    solver_method="jacobian_psuedo",
+                    initial_thetas=solved[position],
+                    rng=rng)
+            except Exception:
+                solved[target] = None
+                stats.record(target)
+
+        if solved[target] is None:
+            return False
+
+    # Check remaining orientations
+    for target in stats.order(targets.orientation_offset + problem.orientations):
+        if target not in solved:
+            try:
+                solved[target] = inverse_kinematics(
+                    robot_node.robot,
+                    target_orientation=targets.orientations[target - targets.orientation_offset],
+                    allowed_pos_error=10,
+                    restart_threshold=100,
+                    solver_method="jacobian_psuedo",
+                    rng=rng,
+                    initial_frames=chain_node.frames)
+            except Exception:
+                solved[target] = None
+                stats.record(target)
+
+        if solved[target] is None:
+            return False
+
+    return True
+
+def warmup():
+    """
+    Load everything the first search would load lazily (the pre-analysis and
+    the prefix trie), so it happens at startup. Call it before forking workers so
+    they share the result instead of each building it.
+    """
+    warmup_dummy()
+
+    analyze_problem(
+        points_only=np.array([(100, 0, 0), (0, 100, 0), (0, 0, 100), (100, 100, 100)]),
+        orientations_only=np.array([(0, 0, 0)]))
+    PrefixTrie().node(dh_params[:2])
+
+def report(progress: Callable[[dict], None], **event):
+    if progress is not None:
+        progress(event)
 
 def nd_range(start, stop, dims):
   if not dims:
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from . import search as search_module
+from .cache import SearchCache, problem_key
+from .search import min_joints_for_orientations, min_joints_for_points, search_batch, split_points_with_orientation
+
+def test_min_joints_for_points():
+    # Points on the base x-y plane
+    p = np.array([(100,0,0),(0,100,0),(300,400,0)])
+    assert min_joints_for_points(p) == 2
+
+    # Equidistant points on the base x-y plane
+    p = np.array([(100,0,0),(0,100,0),(-100,0,0),(0,-100,0)])
+    assert min_joints_for_points(p) == 1
+
+    # Points off every allowed plane
+    p = np.array([(100,0,0),(0,100,0),(0,0,100)])
+    assert min_joints_for_points(p) == 3
+
+    # Points further than 3 joints can reach
+    p = np.array([(3500,0,0)])
+    assert min_joints_for_points(p) == 4
+
+def test_min_joints_for_orientations():
+    (_, mats) = split_points_with_orientation({(0,0,0): np.zeros(3)})
+    assert min_joints_for_orientations(mats) == 1
+
+    (_, mats) = split_points_with_orientation({(0,0,0): np.zeros(3), (1,0,0): np.radians((90,0,0))})
+    assert min_joints_for_orientations(mats) == 2
+
+    (_, mats) = split_points_with_orientation({
+        (0,0,0): np.zeros(3),
+        (1,0,0): np.radians((90,0,0)),
+        (2,0,0): np.radians((0,90,0)),
+    })
+    assert min_joints_for_orientations(mats) == 3
+
+def test_split_points_with_orientation():
+    (points, mats) = split_points_with_orientation({(1,2,3): np.zeros(3)})
+
+    np.testing.assert_allclose(points, [(1,2,3)])
+    np.testing.assert_allclose(mats, [np.eye(3)])
+
+    (points, mats) = split_points_with_orientation(dict())
+    assert points.shape == (0, 3)
+    assert mats.shape == (0, 3, 3)
+
+@pytest.fixture
+def reach_exactly(monkeypatch):
+    """
+    Replace IK so a robot reaches a position exactly when its links add up to its distance from the base.
+    """
+    def inverse_kinematics(robot, target_position=None, **kwargs):
+        length = np.sum(np.max(robot.dh_parameters[:, 1:], axis=1))
+        if not np.isclose(length, np.linalg.norm(target_position)):
+            raise Exception("Unable to meet the tolerance threshold")
+
+        return np.zeros(robot.num_joints)
+
+    monkeypatch.setattr(search_module, "inverse_kinematics", inverse_kinematics)
+
+def link_length(robot_node) -> float:
+    return np.sum(np.max(robot_node.dh_parameters[:, 1:], axis=1))
+
+def test_search_batch_maps_results(reach_exactly):
+    a = {"points_only": np.array([(0, 0, 100)])}
+    b = {"points_only": np.array([(0, 200, 0)])}
+
+    results = search_batch([a, b, a])
+
+    assert len(results) == 3
+    assert link_length(results[0]) == 100
+    assert link_length(results[1]) == 200
+    assert results[2] == results[0]
+
+def test_search_batch_cache(reach_exactly, tmp_path, monkeypatch):
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"))
+    a = {"points_only": np.array([(0, 0, 100)])}
+    b = {"points_only": np.array([(0, 200, 0)])}
+
+    results = search_batch([a, b], cache=cache)
+
+    # batch answers never stand in for a single search
+    assert cache.get(problem_key(**a)) is None
+
+    def fail(*args, **kwargs):
+        raise Exception("searched again")
+    monkeypatch.setattr(search_module, "begin_batch_search", fail)
+
+    # the same batch in any order is answered from the cache
+    assert search_batch([b, a], cache=cache) == results[::-1]
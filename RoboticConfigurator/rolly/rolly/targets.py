@@ -0,0 +1,81 @@
+import numpy as np
+
+class TargetSet:
+    """
+    Deduplicated union of the targets of one or more search problems.
+
+    Every target gets one index in a shared space used by TargetStats and FailureMemo:
+    positions first, then poses, then orientations. Call freeze once every target is added.
+    A pose is checked against its position first, so adding a pose also adds its position.
+    """
+    positions: list
+    poses: list # (position index, rotation matrix)
+    orientations: list
+    position_array: np.ndarray
+    radii: np.ndarray
+    pose_offset: int
+    orientation_offset: int
+    num_targets: int
+
+    def __init__(self):
+        self.positions = []
+        self.poses = []
+        self.orientations = []
+        self.ids = dict()
+
+    def add_position(self, point: np.ndarray) -> int:
+        return self.add(("position",) + round_key(point), self.positions, np.array(point, dtype=float))
+
+    def add_pose(self, point: np.ndarray, rotation: np.ndarray) -> int:
+        position = self.add_position(point)
+        return self.add(("pose", position) + round_key(rotation), self.poses, (position, np.array(rotation, dtype=float)))
+
+    def add_orientation(self, rotation: np.ndarray) -> int:
+        return self.add(("orientation",) + round_key(rotation), self.orientations, np.array(rotation, dtype=float))
+
+    def add(self, key: tuple, targets: list, target) -> int:
+        if key not in self.ids:
+            self.ids[key] = len(targets)
+            targets.append(target)
+
+        return self.ids[key]
+
+    def freeze(self):
+        self.position_array = np.array(self.positions, dtype=float).reshape((-1, 3))
+        self.radii = np.linalg.norm(self.position_array, axis=1)
+        self.pose_offset = len(self.positions)
+        self.orientation_offset = len(self.positions) + len(self.poses)
+        self.num_targets = self.orientation_offset + len(self.orientations)
+
+class SearchProblem:
+    """
+    One problem of a (batch) search, as indexes into the shared TargetSet.
+    """
+    start_joints: int
+    positions: np.ndarray
+    poses: np.ndarray
+    orientations: np.ndarray
+    max_radius: float
+
+    def __init__(self, targets: TargetSet, start_joints: int, points: np.ndarray, orientation_mats: np.ndarray, pose_points: np.ndarray, pose_mats: np.ndarray):
+        self.start_joints = start_joints
+
+        poses = [targets.add_pose(p, m) for (p, m) in zip(pose_points, pose_mats)]
+        positions = [targets.add_position(p) for p in points] + [targets.poses[pose][0] for pose in poses]
+
+        self.positions = np.unique(np.array(positions, dtype=int))
+        self.poses = np.unique(np.array(poses, dtype=int))
+        self.orientations = np.unique(np.array([targets.add_orientation(m) for m in orientation_mats], dtype=int))
+
+        if len(self.positions) > 0:
+            self.max_radius = np.max(np.linalg.norm([targets.positions[p] for p in self.positions], axis=1))
+        else:
+            self.max_radius = 0
+
+    @property
+    def has_orientation(self) -> bool:
+        return len(self.poses) > 0 or len(self.orientations) > 0
+
+def round_key(values: np.ndarray) -> tuple:
+    # adding 0.0 turns -0.0 into 0.0
+    return tuple((np.round(np.array(values, dtype=float).flatten(), 9) + 0.0).tolist())
@@ -0,0 +1,23 @@
+import numpy as np
+from .targets import SearchProblem, TargetSet
+
+def test_target_set_shares_targets():
+    targets = TargetSet()
+
+    p1 = SearchProblem(targets, 2, np.array([(1,0,0),(0,1,0)]), np.zeros((0,3,3)), np.array([(0,0,1)]), np.array([np.eye(3)]))
+    p2 = SearchProblem(targets, 3, np.array([(0,1,0),(0,0,1)]), np.array([np.eye(3)]), np.zeros((0,3)), np.zeros((0,3,3)))
+    targets.freeze()
+
+    # The pose position is shared with the second problem's point
+    assert len(targets.positions) == 3
+    assert len(targets.poses) == 1
+    assert len(targets.orientations) == 1
+    assert targets.num_targets == 5
+
+    np.testing.assert_array_equal(p1.positions, [0,1,2])
+    np.testing.assert_array_equal(p2.positions, [0,2])
+    np.testing.assert_array_equal(p1.poses, [0])
+    np.testing.assert_array_equal(p2.orientations, [0])
+
+    assert p1.has_orientation and p2.has_orientation
+    np.testing.assert_almost_equal(p1.max_radius, 1)
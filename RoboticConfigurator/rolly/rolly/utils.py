@@ -1,5 +1,3 @@
-import math
-
 import numpy as np
 
 def points_equal_distant(points: np.ndarray) -> bool:
@@ -9,56 +7,75 @@ def points_equal_distant(points: np.ndarray) -> bool:
     if points.shape[1] != 3:
         raise Exception("Points must be in 3d space (x,y,z)")
 
-    dist = np.linalg.norm(points[0])
-    for p in points:
-        if not math.isclose(np.linalg.norm(p), dist):
-            return False
-    
-    return True
+    dist = np.linalg.norm(points, axis=1)
+
+    # same tolerance as math.isclose
+    return bool(np.all(np.isclose(dist, dist[0], rtol=1e-09, atol=0)))
+
+def fit_plane(points: np.ndarray) -> tuple:
+    """
+    Least-squares plane through the points using SVD.
+    Returns (unit normal, offset) such that normal.dot(p) == offset for every p on the plane.
+    For colinear or coincident points any plane containing them is returned.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points.shape) != 2 or points.shape[1] != 3:
+        raise Exception("Must list each point in 3d space (x,y,z)")
 
-def points_share_plane(points: np.ndarray) -> bool:
+    centroid = points.mean(axis=0)
+
+    # the right singular vector with the smallest singular value is the normal
+    _, _, vh = np.linalg.svd(points - centroid)
+    normal = vh[-1]
+
+    return (normal, normal.dot(centroid))
+
+def points_share_plane(points: np.ndarray, atol: float = 0.4) -> bool:
+    """
+    Check if all points lie within atol of a single plane.
+    """
     points = np.unique(points, axis=0)
     if len(points.shape) != 2 or points.shape[1] != 3:
         raise Exception("Must list each point in 3d space (x,y,z)")
 
     # 3 points define a plane
-    if points.shape[0] == 1 or points.shape[0] == 2 or points.shape[0] == 3:
+    if points.shape[0] <= 3:
         return True
 
-    # find 3 points that aren't colinear
-    bk = False
-    for i in range(0, len(points)):
-        for j in range(0, len(points)):
-            for k in range(0, len(points)):
-                if i == j or i == k or j == k:
-                    continue
-                
-                pts = np.array([points[i], points[j], points[k]])
-                ab = pts[1]-pts[0]
-                ac = pts[2]-pts[0]
-                cross = np.cross(ab, ac)
-                norm = np.linalg.norm(cross)
-
-                if norm != 0:
-                    # calc equation of plane
-                    p_eq = np.append(cross, -1 * cross.dot(pts[0]))
-                    plane_pts = pts
-                    bk = True
-                    break
-            if bk:
-                break
-        if bk:
-            break
-
-    if not bk:
-        return True
+    (normal, offset) = fit_plane(points)
+
+    return bool(np.all(np.abs(points.dot(normal) - offset) <= atol))
+
+def points_on_planes(points: np.ndarray, normals: np.ndarray, offsets: np.ndarray = None, atol: float = 0.4) -> np.ndarray:
+    """
+    Batched plane test. Check one point set against many candidate planes at once.
+
+    normals: (M, 3) plane normals, they do not have to be unit length.
+    offsets: (M,) plane offsets (normal.dot(p) == offset), planes pass through the origin if omitted.
+    Returns a (M,) boolean array, true where every point lies within atol of that plane.
+    Degenerate (zero length) normals never match.
+    """
+    points = np.asarray(points, dtype=float)
+    normals = np.asarray(normals, dtype=float)
+
+    if len(points.shape) != 2 or points.shape[1] != 3:
+        raise Exception("Must list each point in 3d space (x,y,z)")
+
+    if len(normals.shape) != 2 or normals.shape[1] != 3:
+        raise Exception("Normals must be (x,y,z) vectors")
+
+    if offsets is None:
+        offsets = np.zeros(normals.shape[0])
 
-    rem_points = np.append(points, np.ones((len(points), 1)), axis=1)
-    all_act = rem_points.dot(p_eq)
-    rem_act = np.append(plane_pts, np.ones((len(plane_pts), 1)), axis=1).dot(p_eq)
-    
-    ex = rem_act[0] * np.ones(len(all_act))
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
 
-    return np.allclose(ex, all_act, atol=0.4)
+    unit = np.zeros(normals.shape)
+    unit[valid] = normals[valid] / lengths[valid, None]
+    unit_offsets = np.zeros(normals.shape[0])
+    unit_offsets[valid] = np.asarray(offsets, dtype=float)[valid] / lengths[valid]
 
+    # (N, M) distance of every point to every plane
+    dist = np.abs(points.dot(unit.T) - unit_offsets)
 
+    return valid & np.all(dist <= atol, axis=0)
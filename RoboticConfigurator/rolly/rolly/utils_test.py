@@ -1,5 +1,5 @@
 import numpy as np
-from .utils import points_share_plane, points_equal_distant
+from .utils import fit_plane, points_on_planes, points_share_plane, points_equal_distant
 
 def test_points_equal_distant():
     # 1 point
@@ -37,4 +37,24 @@ def test_points_share_plane():
 
     # Negation
     p = np.array([(0,3,-90),(0,-2,0),(-2,0,0),(0,1,0)])
-    assert not points_share_plane(p)
\ No newline at end of file
+    assert not points_share_plane(p)
+
+    # Many coplanar points off the base planes
+    p = np.array([(x, y, 2*x + 3*y + 5) for x in range(-5, 5) for y in range(-5, 5)])
+    assert points_share_plane(p)
+
+def test_fit_plane():
+    p = np.array([(0,0,4),(1,0,4),(0,1,4),(5,7,4)])
+    (normal, offset) = fit_plane(p)
+
+    np.testing.assert_allclose(np.abs(normal), (0,0,1), atol=1e-9)
+    np.testing.assert_allclose(p.dot(normal), offset * np.ones(4), atol=1e-9)
+
+def test_points_on_planes():
+    p = np.array([(1,0,0),(0,2,0),(-3,4,0)])
+    normals = np.array([(0,0,1),(0,0,5),(0,1,0),(0,0,0)])
+
+    np.testing.assert_array_equal(points_on_planes(p, normals), [True, True, False, False])
+
+    # Offset planes
+    np.testing.assert_array_equal(points_on_planes(p + (0,0,2), normals[:2], offsets=(2,10)), [True, True])